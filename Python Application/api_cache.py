@@ -0,0 +1,109 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlsplit
+
+# Seconds a cached GET is served without asking the server, by endpoint path
+DEFAULT_TTLS = (
+    (r"/employees$", 300),
+    (r"/employee/[^/]+$", 300),
+    (r"/inventory$", 30),
+    (r"/history/[^/]+$", 15),
+)
+
+# TTL for endpoints that don't match any of the rules above
+DEFAULT_TTL = 10
+
+# How long after expiring an entry may still be served while ORDS is failing
+STALE_WINDOW = 600
+
+# Maximum number of cached responses (least recently used are evicted first)
+MAX_ENTRIES = 128
+
+
+class CacheEntry:
+    """A cached response plus the validators needed to revalidate it"""
+
+    __slots__ = ("response", "stored_at", "ttl", "etag", "last_modified")
+
+    def __init__(self, response, ttl):
+        self.response = response
+        self.stored_at = time.monotonic()
+        self.ttl = ttl
+        self.etag = response.headers.get("ETag")
+        self.last_modified = response.headers.get("Last-Modified")
+
+    def age(self):
+        return time.monotonic() - self.stored_at
+
+    def is_fresh(self):
+        return self.age() < self.ttl
+
+    def conditional_headers(self):
+        """Headers that let the server answer 304 Not Modified"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """Thread-safe LRU cache of GET responses with per-endpoint TTLs"""
+
+    def __init__(self, ttls=DEFAULT_TTLS, default_ttl=DEFAULT_TTL,
+                 max_entries=MAX_ENTRIES, stale_window=STALE_WINDOW):
+        self.ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.stale_window = stale_window
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def ttl_for(self, url):
+        path = urlsplit(url).path
+        for pattern, ttl in self.ttls:
+            if pattern.search(path):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url):
+        """Return the entry for ``url`` (fresh or not), or None"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def is_servable_stale(self, entry):
+        """True if an expired entry is still recent enough to show while revalidating"""
+        return entry.age() < entry.ttl + self.stale_window
+
+    def store(self, url, response):
+        entry = CacheEntry(response, self.ttl_for(url))
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def refresh(self, url):
+        """Mark an entry fresh again after the server answered 304"""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                entry.stored_at = time.monotonic()
+            return entry
+
+    def invalidate(self, url):
+        """Drop ``url`` and every cached variant of it with a query string"""
+        with self._lock:
+            for key in [key for key in self._entries if key == url or key.startswith(url + "?")]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,229 @@
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import time
+
+from mock_ords import MockOrds, PAGE_SIZE, ITEMS, BOOKINGS_PER_EMPLOYEE
+import fake_camera
+
+SCENARIOS = ("login", "history", "checkout", "return")
+
+# Runs per scenario
+RUNS = 20
+
+# A flow is finished once the mock server has seen no request for this long (seconds)
+QUIET_PERIOD = 0.2
+
+# Allowed slowdown (p95, requests per flow) against a baseline before --baseline fails the run
+TOLERANCE = 0.25
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+class Bench:
+    """The client wired to a mock ORDS server and a fake camera, plus the results so far"""
+
+    def __init__(self, app, mock, camera, employee_image, verbose=False):
+        self.app = app
+        self.mock = mock
+        self.camera = camera
+        self.employee_image = employee_image
+        self.emp_id = None
+        self.checked_out = []
+        self.messages = []
+        self.verbose = verbose
+        self.results = {name: {"latency": [], "requests": [], "errors": 0} for name in SCENARIOS}
+
+    def log(self, message):
+        """Replacement for the client's console: errors are counted per flow"""
+        self.messages.append(message)
+        if self.verbose:
+            print(message)
+
+    def settle(self):
+        """Wait until background requests started by the flow (prefetch, refresh) are done"""
+        count = self.mock.request_count()
+        while True:
+            time.sleep(QUIET_PERIOD + self.mock.latency)
+            latest = self.mock.request_count()
+            if latest == count:
+                return
+            count = latest
+
+    def run(self, name, flow):
+        self.mock.reset_stats()
+        del self.messages[:]
+        started = time.perf_counter()
+        flow()
+        elapsed = time.perf_counter() - started
+        self.settle()
+
+        result = self.results[name]
+        result["latency"].append(elapsed * 1000)
+        result["requests"].append(self.mock.request_count())
+        if any(message.lstrip().startswith("❌") for message in self.messages):
+            result["errors"] += 1
+
+    # Flows, following what the GUI does for each button
+
+    def login(self):
+        app = self.app
+        # A new session starts with nothing in memory, like after a logout
+        app.response_cache.clear()
+        with app.history_stores_lock:
+            app.history_stores.clear()
+
+        self.camera.show(self.employee_image)
+        code = app.scan_qr_code()
+        self.emp_id = code.replace("EMP", "")
+        app.current_emp_id = self.emp_id
+        app.session_data = app.SessionStore(self.emp_id)
+        app.session_data.prefetch()
+        for name in ("employee", "checkouts", "inventory"):
+            app.session_data.wait(name)
+
+    def history(self):
+        self.app.view_history(self.emp_id)
+
+    def checkout(self):
+        app = self.app
+        inventory = app.session_data.wait("inventory") or []
+        item = next((i for i in inventory if i.item_id not in self.checked_out), None)
+        if item is None:
+            self.messages.append("❌ Nothing left to check out")
+            return
+        self.checked_out.append(item.item_id)
+        app.process_checkout(self.emp_id, {"item_id": item.item_id, "notes": "benchmark", "is_damaged": "N"})
+
+    def do_return(self):
+        app = self.app
+        checkouts = app.session_data.wait("checkouts") or []
+        booking = next((b for b in checkouts if b.item_id in self.checked_out), None) or \
+            next(iter(checkouts), None)
+        if booking is None:
+            self.messages.append("❌ Nothing to return")
+            return
+        if booking.item_id in self.checked_out:
+            self.checked_out.remove(booking.item_id)
+        app.process_return(self.emp_id, {"booking_id": booking.booking_id, "notes": "benchmark",
+                                         "is_damaged": "N"})
+
+    def report(self):
+        summary = {}
+        for name, result in self.results.items():
+            if not result["latency"]:
+                continue
+            summary[name] = {
+                "runs": len(result["latency"]),
+                "p50_ms": round(percentile(result["latency"], 50), 1),
+                "p95_ms": round(percentile(result["latency"], 95), 1),
+                "p99_ms": round(percentile(result["latency"], 99), 1),
+                "requests_per_flow": round(sum(result["requests"]) / len(result["requests"]), 1),
+                "errors": result["errors"],
+            }
+        return summary
+
+
+def print_report(summary, settings):
+    print(f"\n📊 Benchmark ({settings})")
+    print(f"{'Scenario':<10}{'Runs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'Req/flow':>10}{'Errors':>8}")
+    for name, row in summary.items():
+        print(f"{name:<10}{row['runs']:>6}{row['p50_ms']:>10}{row['p95_ms']:>10}{row['p99_ms']:>10}"
+              f"{row['requests_per_flow']:>10}{row['errors']:>8}")
+
+
+def compare(summary, baseline, tolerance):
+    """Descriptions of scenarios whose p95 or request count regressed against ``baseline``"""
+    regressions = []
+    for name, row in summary.items():
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if row["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {old['p95_ms']} ms -> {row['p95_ms']} ms")
+        if row["requests_per_flow"] > old["requests_per_flow"] * (1 + tolerance) + 0.5:
+            regressions.append(f"{name}: {old['requests_per_flow']} -> {row['requests_per_flow']} requests per flow")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end latency benchmarks against a local mock ORDS server")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--latency", type=float, default=0.02, help="mock server latency per request (s)")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--items", type=int, default=ITEMS)
+    parser.add_argument("--bookings", type=int, default=BOOKINGS_PER_EMPLOYEE, help="history rows per employee")
+    parser.add_argument("--no-filters", action="store_true", help="mock an endpoint that ignores q filters")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    parser.add_argument("--baseline", metavar="FILE", help="fail if p95 or requests regressed against this JSON")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed p95 slowdown (0.25 = 25%%)")
+    parser.add_argument("--verbose", action="store_true", help="show the client's messages")
+    args = parser.parse_args()
+
+    mock = MockOrds(latency=args.latency, page_size=args.page_size, items=args.items,
+                    bookings=args.bookings, support_filters=not args.no_filters).start()
+
+    # Keep the client's state files out of the user's home and point it at the mock
+    state = tempfile.TemporaryDirectory(prefix="equipflow-bench-")
+    os.environ["EQUIPFLOW_API_URL"] = mock.url
+    os.environ["EQUIPFLOW_QUEUE_FILE"] = os.path.join(state.name, "outbox.db")
+    os.environ["EQUIPFLOW_SNAPSHOT_FILE"] = os.path.join(state.name, "snapshot.db")
+    os.environ["EQUIPFLOW_SCANNER_CONFIG"] = os.path.join(state.name, "scanner.json")
+
+    import equipflow_app as app
+
+    employee_image = fake_camera.repo_qr_images()[0]
+    camera = fake_camera.install(fake_camera.FakeCamera([employee_image]))
+    bench = Bench(app, mock, camera, employee_image, args.verbose)
+    app.log_console.write = bench.log
+
+    flows = {"login": bench.login, "history": bench.history,
+             "checkout": bench.checkout, "return": bench.do_return}
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with output:
+            app.get_scanner().start()
+            for _ in range(args.runs):
+                # Every iteration is a full session; login also runs when it isn't measured
+                for name in ("login",) + tuple(s for s in SCENARIOS if s != "login"):
+                    if name in args.scenarios:
+                        bench.run(name, flows[name])
+                    elif name == "login":
+                        flows[name]()
+    finally:
+        app.shutdown_scanner()
+        app.get_outbox().close()
+        mock.stop()
+
+    summary = bench.report()
+    settings = (f"latency {args.latency * 1000:.0f} ms, page size {args.page_size}, "
+                f"{args.items} items, {args.bookings} bookings/employee")
+    print_report(summary, settings)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": summary}, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(summary, json.load(f)["results"], args.tolerance)
+        if regressions:
+            print("\n❌ Regressions against the baseline:")
+            for regression in regressions:
+                print(f"   {regression}")
+            sys.exit(1)
+        print("\n✅ No regressions against the baseline")
+
+
+if __name__ == "__main__":
+    main()
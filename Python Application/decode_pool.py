@@ -0,0 +1,75 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import metrics
+from qr_scanner import AdaptiveDetector, RoiTracker, cv2
+
+# Frames waiting or decoding per worker before new frames are dropped
+QUEUE_PER_WORKER = 2
+
+# The detector of this worker process (see _init_worker)
+_detector = None
+
+
+def _init_worker(backend):
+    global _detector
+    # Each worker gets one core; the pool provides the parallelism
+    cv2.setNumThreads(1)
+    _detector = AdaptiveDetector(RoiTracker(), backend)
+
+
+def _decode(gray):
+    # Consecutive frames come from different cameras, so never search a previous code's region
+    _detector.tracker.reset()
+    data, _ = _detector.detect_and_decode(gray)
+    return data.strip() if data else ""
+
+
+class DecodePool:
+    """Process pool that decodes QR codes for many camera streams at once.
+
+    Decoding is CPU-bound, so a shared pool of worker processes (one per
+    core by default) gets past the GIL. Every worker keeps its own
+    detector. Callers send grayscale frames and get a future of the decoded
+    text ("" if there was no code). When ``max_pending`` frames are already
+    queued, ``submit`` drops the frame and returns None instead of letting
+    latency build up: the camera will have a newer frame soon anyway.
+    """
+
+    def __init__(self, workers=None, backend=None, max_pending=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max_pending or self.workers * QUEUE_PER_WORKER
+        self._pending = 0
+        self._lock = threading.Lock()
+        # Workers are spawned, not forked: the parent is a threaded server
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"),
+                                             initializer=_init_worker, initargs=(backend,))
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def submit(self, gray):
+        """Queue a grayscale frame; returns a future of its text, or None if the frame was dropped"""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                metrics.inc("equipflow_decode_dropped_total")
+                return None
+            self._pending += 1
+        try:
+            future = self._executor.submit(_decode, gray)
+        except BaseException:
+            # BrokenProcessPool or shut down: the frame never got a slot
+            self._finished(None)
+            raise
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
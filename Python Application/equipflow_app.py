@@ -1,35 +1,65 @@
-import requests
-import json
-from qr_scanner import scan_employee_qr
-import urllib3
 import time
+
+# Start-up is timed from here for --profile-startup
+STARTUP_STARTED = time.perf_counter()
+
+import argparse
+import os
+from records import HistoryEntry, InventoryItem, Employee
+from search_index import SearchIndex
+from offline_queue import OfflineQueue
+import ords_client
+from ords_client import (API_URL, NetworkError, response_cache, inflight, io_pool, history_stores,
+                         history_stores_lock, transport, make_api_request, fetch_collection, api_error,
+                         get_history_store, load_snapshot, save_snapshot, close_snapshots, fetch_employee,
+                         fetch_available_inventory, sync_history, checkout_payload, return_payload, ApiStatusError)
+import metrics
+from qr_scanner import scan_employee_qr, get_scanner, shutdown_scanner, PREVIEW_FPS, BATCH_WINDOW
 import traceback
 import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import customtkinter as ctk
 from tkinter import messagebox, scrolledtext
 import sys
 from PIL import Image, ImageTk
 
-# Suppress SSL warnings for testing only
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+IMPORTS_FINISHED = time.perf_counter()
 
-# API configuration
-API_URL = "https://oracleapex.com/ords/nexora/api"
-HEADERS = {
-    "Content-Type": "application/json",
-    "User-Agent": "NexoraEquipmentApp/1.0"
-}
+# Seconds to wait for a QR code before giving up
+SCAN_TIMEOUT = 30
+
+# Worker threads for button actions (login, history, checkout, ...)
+ACTION_WORKERS = 4
+
+# How often the Tk thread picks up results from worker threads (ms)
+GUI_POLL_MS = 50
 
-# Create a session for better performance
-session = requests.Session()
-session.verify = False  # Disable SSL verification for testing
-session.timeout = 30
+# Lines kept in the output console (older lines are trimmed from the top)
+MAX_LOG_LINES = 5000
+
+# Most queued messages written to the console per GUI tick
+LOG_BATCH_SIZE = 500
+
+# Rows of the equipment list that get real widgets (the rest are virtual)
+VISIBLE_ROWS = 8
 
 # Global variables for GUI
 current_emp_id = None
 root = None
 text_widget = None
 current_checkouts = []
+session_data = None
+preview_panel = None
+preview_label = None
+preview_job = None
+latest_preview = None
+pending_label = None
+outbox = None
+outbox_lock = threading.Lock()
+
+# Shown instead of an error when a write was saved to be sent later
+QUEUED_OFFLINE = "saved offline"
 
 # Modern color theme
 THEME = {
@@ -58,20 +88,93 @@ FONT_SETTINGS = {
 
 
 def print_to_gui(message):
-    """Print messages to GUI text widget instead of console"""
-    if text_widget:
-        text_widget.insert(ctk.END, message + "\n")
-        text_widget.see(ctk.END)
-    else:
-        print(message)
+    """Print messages to GUI text widget instead of console (safe from any thread)"""
+    log_console.write(message)
+
+
+# Warnings from the API client go to the output console too
+ords_client.log = print_to_gui
+
+
+def publish_preview(frame):
+    """Receive a preview frame from the scanner's capture thread"""
+    global latest_preview
+    # Only hand the frame over - Tk must not be touched off the main thread
+    latest_preview = frame
+
+
+def refresh_preview():
+    """Show the newest camera preview frame (runs on the Tk main thread)"""
+    global latest_preview, preview_job
+    frame = latest_preview
+    if frame is not None:
+        latest_preview = None
+        image = Image.fromarray(frame)
+        preview_image = ctk.CTkImage(light_image=image, size=image.size)
+        preview_label.configure(image=preview_image, text="")
+        preview_label.image = preview_image  # keep a reference
+
+    preview_job = root.after(1000 // PREVIEW_FPS, refresh_preview)
+
+
+def show_scan_preview():
+    """Show the camera preview panel while a scan is running"""
+    preview_panel.grid()
+    if preview_job is None:
+        refresh_preview()
+
+
+def hide_scan_preview():
+    """Hide the camera preview panel once the scan is done"""
+    global preview_job
+    if preview_job is not None:
+        root.after_cancel(preview_job)
+        preview_job = None
+    preview_panel.grid_remove()
+
+
+def cancel_scan():
+    """Stop the scan that is currently waiting for a QR code"""
+    get_scanner().cancel()
+    print_to_gui("👋 Scan cancelled")
+
+
+def run_with_preview(scan_function, *args, **kwargs):
+    """Run a headless scan while showing the camera preview inside the main window"""
+    scanner = get_scanner()
+    task_runner.call_in_gui(show_scan_preview)
+    scanner.set_preview_callback(publish_preview)
+    try:
+        return scan_function(*args, **kwargs)
+    finally:
+        scanner.set_preview_callback(None)
+        task_runner.call_in_gui(hide_scan_preview)
+
+
+def scan_qr_code():
+    """Scan a QR code without an OpenCV window, previewing inside the main window"""
+    if root is None:
+        # No GUI (scripts, benchmarks): there is nowhere to show a preview
+        return scan_employee_qr(timeout=SCAN_TIMEOUT, headless=True)
+    return run_with_preview(scan_employee_qr, timeout=SCAN_TIMEOUT, headless=True)
+
+
+def collect_qr_codes():
+    """Collect every distinct QR code held up to the camera in one pass"""
+    scanner = get_scanner()
+    if root is None:
+        return scanner.collect_codes(window=BATCH_WINDOW, timeout=SCAN_TIMEOUT)
+    return run_with_preview(scanner.collect_codes, window=BATCH_WINDOW, timeout=SCAN_TIMEOUT)
 
 
 def test_connection():
-    """Test if we can connect to the API"""
+    """Test if we can connect to the API (asks for a single row, not the whole collection)"""
     try:
-        response = session.get(f"{API_URL}/employees", headers=HEADERS, timeout=10)
+        response = transport.get(f"{API_URL}/employees?limit=1")
         if response.status_code == 200:
             print_to_gui("✅ API connection successful!")
+            get_outbox().wake()
+            refresh_snapshots()
             return True
         else:
             print_to_gui(f"❌ API returned status: {response.status_code}")
@@ -81,114 +184,397 @@ def test_connection():
         return False
 
 
-def make_api_request(url, method="GET", payload=None):
-    """Helper function to make API requests with better error handling"""
-    try:
-        if method == "GET":
-            response = session.get(url, headers=HEADERS, timeout=15)
-        else:  # POST
-            response = session.post(url, json=payload, headers=HEADERS, timeout=15)
+class TaskRunner:
+    """Bounded thread pool that runs GUI actions off the Tk thread.
+
+    * Actions are keyed; clicking a button again while its action is still
+      running is ignored instead of starting a duplicate request.
+    * ``cancel_all`` (used on logout) drops queued actions and flags running
+      ones, which check ``cancelled()`` before doing anything irreversible.
+    * Worker threads never touch Tk: ``call_in_gui`` queues a callback that
+      the Tk thread picks up with ``root.after``.
+    """
+
+    def __init__(self, max_workers=ACTION_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="action")
+        self._active = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._local = threading.local()
+        self._gui_calls = queue.SimpleQueue()
+        self._root = None
+
+    def start(self, tk_root):
+        """Start delivering worker results to the Tk thread"""
+        self._root = tk_root
+        self._root.after(GUI_POLL_MS, self._process_gui_calls)
+
+    def submit(self, key, function, *args, on_done=None, **kwargs):
+        """Run ``function`` on the pool; returns None if ``key`` is already running"""
+        with self._lock:
+            if key is not None and key in self._active:
+                return None
+            generation = self._generation
+            future = self._pool.submit(self._run, generation, function, args, kwargs)
+            if key is not None:
+                self._active[key] = future
+
+        future.add_done_callback(lambda f: self._finished(key, generation, f, on_done))
+        return future
+
+    def _run(self, generation, function, args, kwargs):
+        if generation != self._generation:
+            return None  # queued before a logout
+        self._local.generation = generation
+        try:
+            return function(*args, **kwargs)
+        finally:
+            self._local.generation = None
 
-        return response
+    def _finished(self, key, generation, future, on_done):
+        with self._lock:
+            if self._active.get(key) is future:
+                del self._active[key]
 
-    except requests.exceptions.Timeout:
-        raise Exception("Request timed out - server may be busy")
-    except requests.exceptions.ConnectionError:
-        raise Exception("Connection failed - check network connection")
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Request error: {e}")
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            print_to_gui(f"❌ Thread error: {error}")
+            traceback.print_exception(type(error), error, error.__traceback__)
+        elif on_done is not None and generation == self._generation:
+            self.call_in_gui(on_done, future.result())
+
+    def is_running(self, key):
+        with self._lock:
+            return key in self._active
+
+    def cancelled(self):
+        """True if the action running on this thread was cancelled by a logout"""
+        generation = getattr(self._local, "generation", None)
+        return generation is not None and generation != self._generation
+
+    def cancel_all(self):
+        """Drop queued actions and flag the running ones as cancelled"""
+        with self._lock:
+            self._generation += 1
+            futures = list(self._active.values())
+            self._active.clear()
+        # Cancelling runs done callbacks on this thread, and _finished takes the lock
+        for future in futures:
+            future.cancel()
+
+    def call_in_gui(self, function, *args):
+        """Run ``function`` on the Tk thread (immediately if there is no GUI)"""
+        if self._root is None:
+            function(*args)
+        else:
+            self._gui_calls.put((function, args))
 
+    def _process_gui_calls(self):
+        # Re-arm first: a callback that opens a modal dialog blocks in wait_window,
+        # and the next tick must still run inside the dialog's event loop
+        self._root.after(GUI_POLL_MS, self._process_gui_calls)
+        while True:
+            try:
+                function, args = self._gui_calls.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                function(*args)
+            except Exception as e:
+                print_to_gui(f"❌ GUI error: {e}")
+                traceback.print_exc()
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+task_runner = TaskRunner()
+
+
+class LogConsole:
+    """Thread-safe, batched writer for the output textbox.
+
+    Any thread may call ``write``; messages are queued and the Tk thread
+    inserts everything that arrived since the last tick in one go, so a long
+    history costs one insert per tick instead of one per line. Only the last
+    ``max_lines`` lines are kept, so a kiosk left running for weeks doesn't
+    grow without bound.
+    """
+
+    def __init__(self, max_lines=MAX_LOG_LINES, batch_size=LOG_BATCH_SIZE):
+        self.max_lines = max_lines
+        self.batch_size = batch_size
+        self._messages = queue.SimpleQueue()
+        self._widget = None
+        self._root = None
+        self._lines = 0
+
+    def attach(self, widget, tk_root):
+        """Start writing queued messages to ``widget`` from the Tk thread"""
+        self._widget = widget
+        self._root = tk_root
+        self._lines = int(widget.index("end-1c").split(".")[0]) - 1
+        self._root.after(GUI_POLL_MS, self._flush)
+
+    def detach(self):
+        """Write any queued messages to stdout and stop using the widget"""
+        self._widget = None
+        self._root = None
+        while True:
+            try:
+                print(self._messages.get_nowait())
+            except queue.Empty:
+                break
 
-def api_call_thread(target_function, *args, **kwargs):
-    """Run API calls in a separate thread to avoid blocking GUI"""
+    def write(self, message):
+        if self._widget is None:
+            print(message)
+        else:
+            self._messages.put(message)
 
-    def thread_wrapper():
-        try:
-            target_function(*args, **kwargs)
-        except Exception as e:
-            print_to_gui(f"❌ Thread error: {e}")
-            traceback.print_exc()
+    def _flush(self):
+        if self._widget is None:
+            return
+        chunk = []
+        while len(chunk) < self.batch_size:
+            try:
+                chunk.append(self._messages.get_nowait())
+            except queue.Empty:
+                break
 
-    thread = threading.Thread(target=thread_wrapper, daemon=True)
-    thread.start()
+        if chunk:
+            text = "\n".join(chunk) + "\n"
+            self._widget.insert(ctk.END, text)
+            self._lines += text.count("\n")
+            excess = self._lines - self.max_lines
+            if excess > 0:
+                self._widget.delete("1.0", f"{excess + 1}.0")
+                self._lines -= excess
+            self._widget.see(ctk.END)
+
+        # Come back straight away while there's a backlog, otherwise on the next tick
+        self._root.after(1 if len(chunk) == self.batch_size else GUI_POLL_MS, self._flush)
+
+
+log_console = LogConsole()
+
+
+def run_action(key, target_function, *args, **kwargs):
+    """Run a button action on the worker pool, ignoring repeat clicks while it runs"""
+    future = task_runner.submit(key, target_function, *args, **kwargs)
+    if future is None:
+        print_to_gui("⏳ Still working on your last request...")
+    return future
 
 
 def view_history(emp_id):
     """View equipment history for an employee"""
-    try:
-        print_to_gui("🌐 Fetching equipment history...")
-        response = make_api_request(f"{API_URL}/history/{emp_id}")
+    shown = []
 
-        if response.status_code != 200:
-            print_to_gui(f"❌ API error: {response.status_code}")
+    def show_page(entries):
+        if not entries:
             return
+        if not shown:
+            print_to_gui("\n📋 Your Equipment History:")
+            print_to_gui("=" * 80)
+        print_to_gui(format_history(entries))
+        shown.append(len(entries))
 
-        history_data = response.json()
+    store = get_history_store(emp_id)
+    try:
+        print_to_gui("🌐 Fetching equipment history...")
 
-        # Handle ORDS response structure
-        if isinstance(history_data, dict) and 'items' in history_data:
-            history = history_data['items']
-        else:
-            history = history_data
+        first_sync = not len(store)
+        # The first download renders each page as soon as it arrives; after
+        # that only new and still-open bookings are fetched and merged
+        sync_history(emp_id, on_page=show_page if first_sync else None, cancelled=task_runner.cancelled)
+        if task_runner.cancelled():
+            return
+        if not first_sync:
+            show_page(store.entries())
 
-        if not history:
+        if not shown:
             print_to_gui("📋 No equipment history found.")
             print_to_gui("   This employee has not checked out any equipment yet.")
-            return
-
-        print_to_gui("\n📋 Your Equipment History:")
-        print_to_gui("=" * 80)
-
-        for h in history:
-            item_name = h.get('ITEM_NAME') or h.get('item_name') or h.get('ItemName') or 'Unknown Item'
-            category = h.get('CATEGORY') or h.get('category') or h.get('Category') or 'Unknown Category'
-            date_booked = h.get('DATE_BOOKED') or h.get('date_booked') or h.get('DateBooked') or 'Unknown Date'
-            date_returned = h.get('DATE_RETURNED') or h.get('date_returned') or h.get('DateReturned')
-            status = h.get('STATUS') or h.get('status') or h.get('Status') or 'Unknown Status'
-            return_notes = h.get('RETURN_NOTES') or h.get('return_notes') or h.get('ReturnNotes')
-            booking_id = h.get('BOOKING_ID') or h.get('booking_id') or h.get('BookingId') or 'N/A'
-
-            status_icon = "✅ Returned" if date_returned else "🔄 Checked Out"
-            print_to_gui(f"{status_icon} | Booking ID: {booking_id}")
-            print_to_gui(f"Item: {item_name} ({category})")
-            print_to_gui(f"Booked: {date_booked}")
-            if date_returned:
-                print_to_gui(f"Returned: {date_returned}")
-            if return_notes:
-                print_to_gui(f"Notes: {return_notes}")
-            print_to_gui("-" * 40)
 
     except Exception as e:
         print_to_gui(f"❌ Failed to fetch history: {e}")
+        if len(store) and not shown:
+            synced = f" (last synced {time.strftime('%d %b %H:%M', time.localtime(store.synced_at))})" \
+                if store.synced_at else ""
+            print_to_gui(f"\n📋 Your saved equipment history{synced}:")
+            print_to_gui("=" * 80)
+            print_to_gui(format_history(store.entries()))
+
+
+def format_history(entries):
+    """Render history entries as console text"""
+    lines = []
+    for h in entries:
+        item_name = h.item_name or 'Unknown Item'
+        category = h.category or 'Unknown Category'
+        date_booked = h.date_booked or 'Unknown Date'
+        date_returned = h.date_returned
+        return_notes = h.return_notes
+        booking_id = h.booking_id or 'N/A'
+
+        status_icon = "✅ Returned" if date_returned else "🔄 Checked Out"
+        lines.append(f"{status_icon} | Booking ID: {booking_id}")
+        lines.append(f"Item: {item_name} ({category})")
+        lines.append(f"Booked: {date_booked}")
+        if date_returned:
+            lines.append(f"Returned: {date_returned}")
+        if return_notes:
+            lines.append(f"Notes: {return_notes}")
+        lines.append("-" * 40)
+    return "\n".join(lines)
+
+
+def refresh_snapshots():
+    """Revalidate the employee directory and inventory snapshots in the background"""
+    def directory():
+        save_snapshot("employees", Employee.from_rows(fetch_collection(f"{API_URL}/employees")))
+
+    def inventory():
+        items = get_available_inventory()
+        if items is not None:
+            save_snapshot("inventory", items)
+
+    io_pool.submit(directory)
+    io_pool.submit(inventory)
+
+
+def fetch_open_checkouts(emp_id):
+    """Sync the employee's history and return the open bookings from its index (None on failure)"""
+    try:
+        return sync_history(emp_id, cancelled=task_runner.cancelled).open_checkouts()
+
+    except Exception as e:
+        print_to_gui(f"❌ Failed to fetch current checkouts: {e}")
+        return None
 
 
 def get_current_checkouts(emp_id):
     """Get currently checked out equipment"""
     global current_checkouts
-    try:
-        response = make_api_request(f"{API_URL}/history/{emp_id}")
-        if response.status_code != 200:
-            return []
+    checkouts = fetch_open_checkouts(emp_id)
+    if checkouts is None:
+        return []
 
-        history_data = response.json()
-        if isinstance(history_data, dict) and 'items' in history_data:
-            history = history_data['items']
-        else:
-            history = history_data
+    current_checkouts = checkouts
+    return current_checkouts
 
-        current_checkouts = [h for h in history if
-                             not h.get('DATE_RETURNED') and not h.get('date_returned') and not h.get('DateReturned')]
-        return current_checkouts
 
-    except Exception as e:
-        print_to_gui(f"❌ Failed to fetch current checkouts: {e}")
-        return []
+class SessionStore:
+    """Employee, open checkouts and inventory prefetched right after login.
+
+    All three are fetched concurrently as soon as the QR code is accepted,
+    so the dialogs can open from memory. Each dataset can be refreshed in
+    the background; readers keep seeing the last loaded value meanwhile.
+    Until the first fetch finishes, readers see the copy saved on disk by an
+    earlier session (stale-while-revalidate), so a returning user is greeted
+    and can open dialogs without waiting for the network.
+    """
+
+    def __init__(self, emp_id):
+        self.emp_id = emp_id
+        self._loaders = {
+            "employee": lambda: get_employee_info(emp_id),
+            "checkouts": lambda: fetch_open_checkouts(emp_id),
+            "inventory": get_available_inventory,
+        }
+        self._snapshots = {
+            "employee": (f"employee/{emp_id}", Employee),
+            "checkouts": (f"checkouts/{emp_id}", HistoryEntry),
+            "inventory": ("inventory", InventoryItem),
+        }
+        self._values = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def prefetch(self):
+        """Show the saved copies straight away and start loading everything at once"""
+        self.load_snapshots()
+        for name in self._loaders:
+            self.refresh(name)
+
+    def load_snapshots(self):
+        for name, (key, record_type) in self._snapshots.items():
+            snapshot = load_snapshot(key, record_type)
+            if name == "employee":
+                employee = snapshot[0][0] if snapshot and snapshot[0] else self._from_directory()
+                if employee is not None:
+                    self._values.setdefault(name, employee)
+            elif snapshot is not None:
+                self._values.setdefault(name, snapshot[0])
+
+    def _from_directory(self):
+        snapshot = load_snapshot("employees", Employee)
+        for employee in snapshot[0] if snapshot else []:
+            if str(employee.employee_id) == str(self.emp_id):
+                return employee
+        return None
+
+    def refresh(self, name):
+        """Reload one dataset in the background and return its future"""
+        with self._lock:
+            future = self._pending.get(name)
+            if future is not None and not future.done():
+                return future
+            future = io_pool.submit(self._loaders[name])
+            self._pending[name] = future
+        future.add_done_callback(lambda f: self._store(name, f))
+        return future
+
+    def _store(self, name, future):
+        if future.exception() is None and future.result() is not None:
+            value = future.result()
+            with self._lock:
+                self._values[name] = value
+            key = self._snapshots[name][0]
+            save_snapshot(key, [value] if name == "employee" else value)
+
+    def get(self, name):
+        """Return the last loaded value, or None if it hasn't arrived yet"""
+        with self._lock:
+            return self._values.get(name)
+
+    def wait(self, name, timeout=None):
+        """Block (off the Tk thread) until ``name`` has been loaded at least once"""
+        value = self.get(name)
+        if value is None:
+            self.refresh(name).result(timeout)
+            value = self.get(name)
+        return value
+
+    def when_ready(self, name, callback):
+        """Call ``callback(value)`` on the Tk thread once ``name`` is loaded.
+
+        ``value`` is None if loading failed.
+        """
+        value = self.get(name)
+        if value is not None:
+            callback(value)
+            return
+
+        future = self.refresh(name)
+
+        def poll():
+            if future.done():
+                callback(self.get(name))
+            else:
+                root.after(50, poll)
+
+        poll()
 
 
 def show_history():
     """Wrapper for view_history to run in thread"""
     if current_emp_id:
-        api_call_thread(view_history, current_emp_id)
+        run_action("history", view_history, current_emp_id)
     else:
         messagebox.showerror("Error", "Please login first")
 
@@ -219,8 +605,7 @@ class ReturnDialog(ctk.CTkToplevel):
 
         self.booking_var = ctk.StringVar()
         booking_combo = ctk.CTkComboBox(main_frame, variable=self.booking_var,
-                                        values=[str(item.get('BOOKING_ID') or item.get('booking_id') or item.get(
-                                            'BookingId') or 'N/A') for item in self.checkouts],
+                                        values=[str(item.booking_id or 'N/A') for item in self.checkouts],
                                         font=FONT_SETTINGS["normal"],
                                         dropdown_font=FONT_SETTINGS["normal"],
                                         height=40)
@@ -284,12 +669,13 @@ class ReturnDialog(ctk.CTkToplevel):
         self.destroy()
 
 
+@metrics.timed("equipflow_flow", flow="return")
 def process_return(emp_id, return_data):
     """Process equipment return"""
     try:
         # QR code verification
         print_to_gui("\n📷 Scan your employee QR code to confirm identity...")
-        scanned_emp_id = scan_employee_qr()
+        scanned_emp_id = scan_qr_code()
         if not scanned_emp_id:
             print_to_gui("❌ Scan failed")
             return
@@ -297,48 +683,156 @@ def process_return(emp_id, return_data):
             print_to_gui("❌ QR Code does not match your Employee ID")
             return
 
-        # Prepare payload
-        payload = {
-            "booking_id": int(return_data["booking_id"]),
-            "employee_id": int(emp_id),
-            "qr_code": scanned_emp_id,
-            "return_notes": return_data["notes"],
-            "is_damaged": return_data["is_damaged"]
-        }
+        if task_runner.cancelled():
+            return
 
-        # Make API call
         print_to_gui("🔄 Processing return...")
-        response = make_api_request(f"{API_URL}/return", "POST", payload)
+        success, message = submit_return(emp_id, return_data, scanned_emp_id)
 
-        if response.status_code == 200:
+        if success and message == QUEUED_OFFLINE:
+            print_to_gui("📥 No connection - return saved and will be sent automatically")
+        elif success:
             print_to_gui("✅ Equipment returned successfully!")
+            refresh_session_data()
         else:
-            try:
-                error_data = response.json()
-                print_to_gui(f"❌ Return failed: {error_data.get('error', 'Unknown error')}")
-            except json.JSONDecodeError:
-                print_to_gui(f"❌ Return failed: {response.text}")
+            print_to_gui(f"❌ Return failed: {message}")
 
     except Exception as e:
         print_to_gui(f"❌ Return request failed: {e}")
 
 
+def refresh_session_data():
+    """Reload open checkouts and inventory after a checkout or return changed them"""
+    if session_data:
+        session_data.refresh("checkouts")
+        session_data.refresh("inventory")
+
+
+def submit_return(emp_id, return_data, qr_code):
+    """Send a return to the API, returning (success, error message)"""
+    return submit_write(f"{API_URL}/return", return_payload(emp_id, return_data, qr_code))
+
+
 def return_equipment_gui():
     """GUI for returning equipment"""
     if not current_emp_id:
         messagebox.showerror("Error", "Please login first")
         return
 
-    checkouts = get_current_checkouts(current_emp_id)
-    if not checkouts:
+    session_data.when_ready("checkouts", show_return_dialog)
+
+
+def show_return_dialog(checkouts):
+    """Open the return dialog from the prefetched open checkouts"""
+    global current_checkouts
+    if checkouts is None:
+        messagebox.showerror("Error", "Could not load your checked out equipment")
+        return
+
+    # Open from memory now, refresh in the background for next time
+    session_data.refresh("checkouts")
+
+    current_checkouts = checkouts
+    if not current_checkouts:
         messagebox.showinfo("Info", "No equipment currently checked out")
         return
 
-    dialog = ReturnDialog(root, checkouts)
+    dialog = ReturnDialog(root, current_checkouts)
     dialog.wait_window()
 
     if dialog.result:
-        api_call_thread(process_return, current_emp_id, dialog.result)
+        run_action("return", process_return, current_emp_id, dialog.result)
+
+
+class VirtualList(ctk.CTkFrame):
+    """Scrollable, selectable list that only creates widgets for visible rows.
+
+    A fixed pool of row buttons is created once and reused: scrolling or
+    replacing the items (e.g. after a search) only changes the text the
+    rows show, so a list of thousands of items opens as fast as a short one.
+    ``render(item)`` returns ``(value, text)`` for an item; the selected
+    value is written to ``variable``.
+    """
+
+    def __init__(self, master, render, variable, visible_rows=VISIBLE_ROWS, **kwargs):
+        super().__init__(master, **kwargs)
+        self.render = render
+        self.variable = variable
+        self.items = []
+        self.top = 0
+        self._values = [None] * visible_rows
+        self.grid_columnconfigure(0, weight=1)
+
+        self._rows = []
+        for index in range(visible_rows):
+            row = ctk.CTkButton(self, text="", anchor="w", height=36,
+                                font=FONT_SETTINGS["normal"],
+                                fg_color=THEME["light_bg"],
+                                hover_color=THEME["border"],
+                                text_color=THEME["text_dark"],
+                                command=lambda index=index: self._select(index))
+            row.grid(row=index, column=0, sticky="ew", padx=5, pady=2)
+            self._bind_wheel(row)
+            self._rows.append(row)
+
+        self._scrollbar = ctk.CTkScrollbar(self, command=self._scroll_command)
+        self._scrollbar.grid(row=0, column=1, rowspan=visible_rows, sticky="ns")
+        self._bind_wheel(self)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.scroll(-1 if e.delta > 0 else 1))
+        widget.bind("<Button-4>", lambda e: self.scroll(-1))
+        widget.bind("<Button-5>", lambda e: self.scroll(1))
+
+    def set_items(self, items):
+        self.items = items
+        self.top = 0
+        self._redraw()
+
+    def scroll(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def scroll_to(self, top):
+        top = max(0, min(top, len(self.items) - len(self._rows)))
+        if top != self.top:
+            self.top = top
+            self._redraw()
+
+    def _scroll_command(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.items)))
+        elif unit == "pages":
+            self.scroll(int(amount) * len(self._rows))
+        else:
+            self.scroll(int(amount))
+
+    def _select(self, index):
+        if self._values[index] is not None:
+            self.variable.set(self._values[index])
+            self._redraw()
+
+    def _redraw(self):
+        selected = self.variable.get()
+        for index, row in enumerate(self._rows):
+            position = self.top + index
+            if position < len(self.items):
+                value, text = self.render(self.items[position])
+                self._values[index] = value
+                # The StringVar holds a string; ORDS IDs are often numbers
+                chosen = str(value) == selected
+                row.configure(text=text, state="normal",
+                              fg_color=THEME["primary"] if chosen else THEME["light_bg"],
+                              text_color=THEME["text_light"] if chosen else THEME["text_dark"])
+            else:
+                self._values[index] = None
+                row.configure(text="", state="disabled", fg_color="transparent")
+
+        if self.items:
+            first = self.top / len(self.items)
+            last = min(self.top + len(self._rows), len(self.items)) / len(self.items)
+            self._scrollbar.set(first, last)
+        else:
+            self._scrollbar.set(0, 1)
 
 
 class CheckoutDialog(ctk.CTkToplevel):
@@ -365,24 +859,21 @@ class CheckoutDialog(ctk.CTkToplevel):
                      font=FONT_SETTINGS["normal"],
                      text_color=THEME["text_dark"]).pack(anchor="w", padx=20, pady=(0, 10))
 
-        # Create a scrollable frame for equipment list
-        scroll_frame = ctk.CTkScrollableFrame(main_frame, height=250)
-        scroll_frame.pack(fill="both", expand=True, padx=20, pady=10)
+        # Search box, filtering the list as the user types
+        self.search_var = ctk.StringVar()
+        search_entry = ctk.CTkEntry(main_frame, textvariable=self.search_var,
+                                    placeholder_text="🔍 Search by name, ID or category",
+                                    font=FONT_SETTINGS["normal"], height=36)
+        search_entry.pack(fill="x", padx=20, pady=(0, 10))
 
+        # Only the visible rows of the equipment list are real widgets
         self.equipment_var = ctk.StringVar()
-        for item in self.inventory:
-            item_id = item.get('ITEM_ID') or item.get('item_id') or item.get('ItemId') or 'N/A'
-            item_name = item.get('ITEM_NAME') or item.get('item_name') or item.get('ItemName') or 'Unknown'
-            quantity = item.get('QUANTITY') or item.get('quantity') or item.get('Quantity') or 0
-
-            frame = ctk.CTkFrame(scroll_frame, fg_color=THEME["light_bg"])
-            frame.pack(fill="x", pady=5, padx=5)
-
-            ctk.CTkRadioButton(frame,
-                               text=f"{item_name} (ID: {item_id}, Qty: {quantity})",
-                               variable=self.equipment_var,
-                               value=item_id,
-                               font=FONT_SETTINGS["normal"]).pack(anchor="w", padx=10, pady=5)
+        self.search_index = SearchIndex(self.inventory, ("item_name", "item_id", "category"))
+        self.equipment_list = VirtualList(main_frame, self.render_item, self.equipment_var,
+                                          fg_color="transparent")
+        self.equipment_list.pack(fill="both", expand=True, padx=20, pady=10)
+        self.equipment_list.set_items(self.inventory)
+        self.search_var.trace_add("write", lambda *args: self.filter_items())
 
         # Notes
         ctk.CTkLabel(main_frame, text="Checkout Notes:",
@@ -425,6 +916,16 @@ class CheckoutDialog(ctk.CTkToplevel):
                       height=40,
                       fg_color=THEME["secondary"]).pack(side="left", padx=10)
 
+    @staticmethod
+    def render_item(item):
+        item_id = item.item_id or 'N/A'
+        item_name = item.item_name or 'Unknown'
+        quantity = item.quantity or 0
+        return item_id, f"{item_name} (ID: {item_id}, Qty: {quantity})"
+
+    def filter_items(self):
+        self.equipment_list.set_items(self.search_index.search(self.search_var.get()))
+
     def confirm_checkout(self):
         item_id = self.equipment_var.get()
         if not item_id:
@@ -443,34 +944,21 @@ class CheckoutDialog(ctk.CTkToplevel):
 
 
 def get_available_inventory():
-    """Get available equipment inventory"""
+    """Get available equipment inventory (None on failure)"""
     try:
-        response = make_api_request(f"{API_URL}/inventory")
-        if response.status_code == 200:
-            inventory_data = response.json()
-            if isinstance(inventory_data, dict) and 'items' in inventory_data:
-                inventory = inventory_data['items']
-            else:
-                inventory = inventory_data
-
-            available_items = []
-            for item in inventory:
-                status = item.get('STATUS') or item.get('status') or item.get('Status')
-                if status == 'Available':
-                    available_items.append(item)
-            return available_items
-        return []
+        return fetch_available_inventory()
     except Exception as e:
         print_to_gui(f"❌ Failed to fetch inventory: {e}")
-        return []
+        return None
 
 
+@metrics.timed("equipflow_flow", flow="checkout")
 def process_checkout(emp_id, checkout_data):
     """Process equipment checkout"""
     try:
         # QR code verification
         print_to_gui("\n📷 Scan your employee QR code to confirm identity...")
-        scanned_emp_id = scan_employee_qr()
+        scanned_emp_id = scan_qr_code()
         if not scanned_emp_id:
             print_to_gui("❌ Scan failed")
             return
@@ -478,39 +966,100 @@ def process_checkout(emp_id, checkout_data):
             print_to_gui("❌ QR Code does not match your Employee ID")
             return
 
-        # Prepare payload
-        payload = {
-            "item_id": checkout_data["item_id"],
-            "employee_id": int(emp_id),
-            "qr_code": scanned_emp_id,
-            "is_damaged": checkout_data["is_damaged"],
-            "checkout_notes": checkout_data["notes"]
-        }
+        if task_runner.cancelled():
+            return
 
-        # Make API call
         print_to_gui("🔄 Processing checkout...")
-        response = make_api_request(f"{API_URL}/checkout", "POST", payload)
+        success, message = submit_checkout(emp_id, checkout_data, scanned_emp_id)
 
-        if response.status_code == 200:
+        if success and message == QUEUED_OFFLINE:
+            print_to_gui("📥 No connection - checkout saved and will be sent automatically")
+        elif success:
             print_to_gui("✅ Equipment checked out successfully!")
+            refresh_session_data()
         else:
-            try:
-                error_data = response.json()
-                print_to_gui(f"❌ Checkout failed: {error_data.get('error', 'Unknown error')}")
-            except json.JSONDecodeError:
-                print_to_gui(f"❌ Checkout failed: {response.text}")
+            print_to_gui(f"❌ Checkout failed: {message}")
 
     except Exception as e:
         print_to_gui(f"❌ Checkout request failed: {e}")
 
 
+def submit_checkout(emp_id, checkout_data, qr_code):
+    """Send a checkout to the API, returning (success, error message)"""
+    return submit_write(f"{API_URL}/checkout", checkout_payload(emp_id, checkout_data, qr_code))
+
+
+def submit_write(url, payload):
+    """POST through the offline queue, returning (success, error message).
+
+    If the API can't take the write right now it is kept on disk and sent
+    later; that counts as success, with QUEUED_OFFLINE as the message.
+    """
+    response = get_outbox().submit(url, payload)
+    if response is None:
+        return True, QUEUED_OFFLINE
+    if response.status_code == 200:
+        return True, None
+    return False, api_error(response)
+
+
+def send_queued_write(url, payload, key):
+    """Send one write from the offline queue; the key lets the server drop replays"""
+    return make_api_request(url, "POST", payload, headers={"Idempotency-Key": key})
+
+
+def report_replayed_write(write, response):
+    """Tell the user how a write that was saved offline turned out"""
+    action = "checkout" if write.url.endswith("/checkout") else "return"
+    if response.status_code == 200:
+        print_to_gui(f"📤 Offline {action} sent")
+        refresh_session_data()
+    else:
+        print_to_gui(f"❌ Offline {action} was rejected: {api_error(response)}")
+
+
+def report_dropped_write(write, error):
+    """Tell the user a write saved offline could not be delivered and was given up on"""
+    action = "checkout" if write.url.endswith("/checkout") else "return"
+    print_to_gui(f"❌ Offline {action} failed {write.rejections + 1} times and was dropped: {error}")
+
+
+def show_pending_writes(count):
+    """Show how many writes are waiting to be sent (hidden when none are)"""
+    if pending_label is None:
+        return
+    if count:
+        pending_label.configure(text=f"📤 {count} transaction(s) waiting for the network")
+        pending_label.grid()
+    else:
+        pending_label.grid_remove()
+
+
+def get_outbox():
+    """Return the offline write queue, opening it on first use"""
+    global outbox
+    with outbox_lock:
+        if outbox is None:
+            outbox = OfflineQueue(send_queued_write, retry_on=(NetworkError,),
+                                  on_result=report_replayed_write, on_error=report_dropped_write,
+                                  on_change=lambda count: task_runner.call_in_gui(show_pending_writes, count))
+        return outbox
+
+
 def checkout_equipment_gui():
     """GUI for checking out equipment"""
     if not current_emp_id:
         messagebox.showerror("Error", "Please login first")
         return
 
-    inventory = get_available_inventory()
+    session_data.when_ready("inventory", show_checkout_dialog)
+
+
+def show_checkout_dialog(inventory):
+    """Open the checkout dialog from the prefetched inventory"""
+    # Open from memory now, refresh in the background for next time
+    session_data.refresh("inventory")
+
     if not inventory:
         messagebox.showinfo("Info", "No equipment available for checkout")
         return
@@ -519,12 +1068,203 @@ def checkout_equipment_gui():
     dialog.wait_window()
 
     if dialog.result:
-        api_call_thread(process_checkout, current_emp_id, dialog.result)
+        run_action("checkout", process_checkout, current_emp_id, dialog.result)
+
+
+class BatchDialog(ctk.CTkToplevel):
+    def __init__(self, parent, to_checkout, to_return):
+        super().__init__(parent)
+        self.title("Batch Checkout / Return")
+        self.geometry("700x600")
+        self.to_checkout = to_checkout
+        self.to_return = to_return
+        self.result = None
+
+        self.create_widgets()
+
+    def create_widgets(self):
+        main_frame = ctk.CTkFrame(self, fg_color=THEME["card_bg"], corner_radius=12)
+        main_frame.pack(fill="both", expand=True, padx=20, pady=20)
+
+        # Header
+        ctk.CTkLabel(main_frame, text="Batch Checkout / Return",
+                     font=FONT_SETTINGS["header"],
+                     text_color=THEME["text_dark"]).pack(pady=20)
+
+        # Scanned items
+        scroll_frame = ctk.CTkScrollableFrame(main_frame, height=250)
+        scroll_frame.pack(fill="both", expand=True, padx=20, pady=10)
+
+        for label, items in (("📦 To check out:", self.to_checkout), ("🔄 To return:", self.to_return)):
+            if not items:
+                continue
+            ctk.CTkLabel(scroll_frame, text=label,
+                         font=FONT_SETTINGS["subheader"],
+                         text_color=THEME["text_dark"]).pack(anchor="w", padx=10, pady=(10, 5))
+            for item in items:
+                ctk.CTkLabel(scroll_frame, text=f"   {item['label']}",
+                             font=FONT_SETTINGS["normal"],
+                             text_color=THEME["text_dark"]).pack(anchor="w", padx=10)
+
+        # Notes
+        ctk.CTkLabel(main_frame, text="Notes (applied to every item):",
+                     font=FONT_SETTINGS["normal"],
+                     text_color=THEME["text_dark"]).pack(anchor="w", padx=20, pady=(20, 10))
+
+        self.notes_entry = ctk.CTkTextbox(main_frame, height=80, font=FONT_SETTINGS["normal"])
+        self.notes_entry.pack(fill="x", padx=20, pady=(0, 20))
+
+        # Buttons
+        button_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
+        button_frame.pack(pady=20)
+
+        ctk.CTkButton(button_frame, text="Confirm All",
+                      command=self.confirm,
+                      font=FONT_SETTINGS["button"],
+                      height=40,
+                      fg_color=THEME["primary"]).pack(side="left", padx=10)
+
+        ctk.CTkButton(button_frame, text="Cancel",
+                      command=self.cancel,
+                      font=FONT_SETTINGS["button"],
+                      height=40,
+                      fg_color=THEME["secondary"]).pack(side="left", padx=10)
+
+    def confirm(self):
+        self.result = {"notes": self.notes_entry.get("1.0", "end-1c")}
+        self.destroy()
+
+    def cancel(self):
+        self.destroy()
+
+
+def plan_batch(emp_id, item_codes):
+    """Split scanned item codes into checkouts and returns for this employee"""
+    open_bookings = {}
+    for h in get_current_checkouts(emp_id):
+        if h.item_id is not None and h.booking_id is not None:
+            open_bookings[str(h.item_id)] = h
+
+    available = {}
+    for item in get_available_inventory() or []:
+        if item.item_id is not None:
+            available[str(item.item_id)] = item
+
+    to_checkout, to_return, unknown = [], [], []
+    for code in item_codes:
+        if code in open_bookings:
+            h = open_bookings[code]
+            item_name = h.item_name or code
+            to_return.append({"booking_id": h.booking_id, "label": f"{item_name} (Booking ID: {h.booking_id})"})
+        elif code in available:
+            item = available[code]
+            item_name = item.item_name or code
+            to_checkout.append({"item_id": code, "label": f"{item_name} (ID: {code})"})
+        else:
+            unknown.append(code)
+
+    return to_checkout, to_return, unknown
+
+
+def process_batch(emp_id, to_checkout, to_return, notes, qr_code):
+    """Submit every batch checkout/return concurrently under one identity check"""
+    try:
+        if not qr_code:
+            # The batch didn't include the employee's own code
+            print_to_gui("\n📷 Scan your employee QR code to confirm identity...")
+            qr_code = scan_qr_code()
+            if not qr_code:
+                print_to_gui("❌ Scan failed")
+                return
+            if qr_code != f"EMP{emp_id}":
+                print_to_gui("❌ QR Code does not match your Employee ID")
+                return
+
+        if task_runner.cancelled():
+            return
+
+        print_to_gui(f"🔄 Processing {len(to_checkout)} checkout(s) and {len(to_return)} return(s)...")
+
+        succeeded = 0
+        futures = {}
+        for item in to_checkout:
+            data = {"item_id": item["item_id"], "notes": notes, "is_damaged": "N"}
+            futures[io_pool.submit(submit_checkout, emp_id, data, qr_code)] = f"Checkout {item['label']}"
+        for item in to_return:
+            data = {"booking_id": item["booking_id"], "notes": notes, "is_damaged": "N"}
+            futures[io_pool.submit(submit_return, emp_id, data, qr_code)] = f"Return {item['label']}"
+
+        for future in as_completed(futures):
+            label = futures[future]
+            try:
+                success, message = future.result()
+            except Exception as e:
+                success, message = False, e
+            if success:
+                succeeded += 1
+                print_to_gui(f"📥 {label} ({QUEUED_OFFLINE})" if message else f"✅ {label}")
+            else:
+                print_to_gui(f"❌ {label} failed: {message}")
+
+        print_to_gui(f"📋 Batch complete: {succeeded}/{len(futures)} succeeded")
+        if succeeded:
+            refresh_session_data()
+
+    except Exception as e:
+        print_to_gui(f"❌ Batch request failed: {e}")
+
+
+def show_batch_dialog(emp_id, to_checkout, to_return, qr_code):
+    """Confirm a planned batch on the Tk main thread"""
+    dialog = BatchDialog(root, to_checkout, to_return)
+    dialog.wait_window()
+
+    if dialog.result:
+        run_action("batch-submit", process_batch, emp_id, to_checkout, to_return, dialog.result["notes"], qr_code)
+
+
+def batch_scan_gui():
+    """Scan several item tags (and your employee QR) in one pass"""
+    if not current_emp_id:
+        messagebox.showerror("Error", "Please login first")
+        return
+
+    emp_id = current_emp_id
+
+    def batch_thread():
+        print_to_gui("\n📷 Hold your item QR codes (and your employee QR code) in front of the camera...")
+        codes = collect_qr_codes()
+        if not codes:
+            print_to_gui("❌ No QR codes scanned")
+            return
+
+        employee_codes = [code for code in codes if code.startswith("EMP")]
+        item_codes = [code for code in codes if not code.startswith("EMP")]
+        print_to_gui(f"✅ Scanned {len(item_codes)} item code(s)")
+
+        if any(code != f"EMP{emp_id}" for code in employee_codes):
+            print_to_gui("❌ QR Code does not match your Employee ID")
+            return
+        if not item_codes:
+            print_to_gui("❌ No item QR codes scanned")
+            return
+
+        to_checkout, to_return, unknown = plan_batch(emp_id, item_codes)
+        for code in unknown:
+            print_to_gui(f"⚠️ Skipping {code}: not available and not checked out by you")
+        if not to_checkout and not to_return:
+            return
+
+        qr_code = employee_codes[0] if employee_codes else None
+        if not task_runner.cancelled():
+            task_runner.call_in_gui(show_batch_dialog, emp_id, to_checkout, to_return, qr_code)
+
+    run_action("batch-scan", batch_thread)
 
 
 def create_gui():
     """Create the CustomTkinter GUI"""
-    global root, text_widget
+    global root, text_widget, preview_panel, preview_label, pending_label
 
     ctk.set_appearance_mode("light")
     ctk.set_default_color_theme("blue")
@@ -548,7 +1288,7 @@ def create_gui():
                                text="Nexora Equipment Management",
                                font=FONT_SETTINGS["title"],
                                text_color=THEME["primary"])
-    title_label.grid(row=0, column=0, pady=(0, 20))
+    title_label.grid(row=0, column=0, columnspan=2, pady=(0, 20))
 
     # Text output area
     text_widget = ctk.CTkTextbox(main_frame,
@@ -557,9 +1297,35 @@ def create_gui():
                                  text_color=THEME["text_dark"])
     text_widget.grid(row=1, column=0, sticky="nsew", padx=10, pady=10)
 
+    # Camera preview, only shown while a scan is running
+    preview_panel = ctk.CTkFrame(main_frame, fg_color=THEME["card_bg"], corner_radius=12)
+    preview_panel.grid(row=1, column=1, sticky="n", padx=10, pady=10)
+
+    preview_label = ctk.CTkLabel(preview_panel,
+                                 text="📷 Starting camera...",
+                                 font=FONT_SETTINGS["small"],
+                                 text_color=THEME["text_dark"])
+    preview_label.pack(padx=10, pady=10)
+
+    ctk.CTkButton(preview_panel,
+                  text="Cancel Scan",
+                  command=cancel_scan,
+                  font=FONT_SETTINGS["button"],
+                  height=40,
+                  fg_color=THEME["secondary"]).pack(padx=10, pady=(0, 10))
+    preview_panel.grid_remove()
+
+    # Offline queue indicator, only shown while writes are waiting
+    pending_label = ctk.CTkLabel(main_frame,
+                                 text="",
+                                 font=FONT_SETTINGS["small"],
+                                 text_color=THEME["warning"])
+    pending_label.grid(row=2, column=0, columnspan=2)
+    pending_label.grid_remove()
+
     # Button frame
     button_frame = ctk.CTkFrame(main_frame, fg_color="transparent")
-    button_frame.grid(row=2, column=0, pady=20)
+    button_frame.grid(row=3, column=0, columnspan=2, pady=20)
 
     # Buttons with larger fonts and modern styling
     button_style = {
@@ -597,16 +1363,41 @@ def create_gui():
                                  **button_style)
     checkout_btn.grid(row=0, column=3, padx=10, pady=10)
 
+    batch_btn = ctk.CTkButton(button_frame,
+                              text="🗂️ Batch Scan",
+                              command=batch_scan_gui,
+                              fg_color=THEME["secondary"],
+                              **button_style)
+    batch_btn.grid(row=1, column=0, padx=10, pady=10)
+
+    logout_btn = ctk.CTkButton(button_frame,
+                               text="🔒 Logout",
+                               command=logout,
+                               fg_color=THEME["secondary"],
+                               **button_style)
+    logout_btn.grid(row=1, column=1, padx=10, pady=10)
+
     exit_btn = ctk.CTkButton(button_frame,
                              text="🚪 Exit",
                              command=root.quit,
                              fg_color=THEME["danger"],
                              **button_style)
-    exit_btn.grid(row=0, column=4, padx=10, pady=10)
+    exit_btn.grid(row=1, column=2, padx=10, pady=10)
+
+    # Deliver worker results to the GUI
+    task_runner.start(root)
+    log_console.attach(text_widget, root)
 
     # Test connection on startup
     print_to_gui("🚀 Starting Nexora Equipment Management System...")
-    api_call_thread(test_connection)
+    run_action("test-connection", test_connection)
+
+    # Send any writes left over from a previous run
+    run_action("outbox", get_outbox().start)
+
+    # Warm up the camera so the first scan doesn't pay for opening it. This
+    # is also what loads OpenCV, so wait until the window has been drawn.
+    root.after_idle(lambda: run_action("camera-warmup", get_scanner().start))
 
     return root
 
@@ -614,58 +1405,122 @@ def create_gui():
 def login():
     """Handle QR login"""
 
+    @metrics.timed("equipflow_flow", flow="login")
     def login_thread():
-        global current_emp_id
+        global current_emp_id, session_data
         print_to_gui("\n📷 Scan your employee QR code to login...")
-        scanned_qr = scan_employee_qr()
+        scanned_qr = scan_qr_code()
 
         if not scanned_qr:
             print_to_gui("❌ Login failed.")
             return
 
+        if task_runner.cancelled():
+            return
+
         if scanned_qr.startswith("EMP"):
             emp_id = scanned_qr.replace("EMP", "")
+            # Fetch employee, history and inventory concurrently right away
+            session_data = SessionStore(emp_id)
+            session_data.prefetch()
+
             current_emp_id = emp_id
             print_to_gui(f"✅ Logged in as Employee ID: {emp_id}")
 
             # Get employee info
-            emp_info = get_employee_info(emp_id)
+            emp_info = session_data.wait("employee")
             if emp_info:
-                first_name = emp_info.get('FIRST_NAME') or emp_info.get('first_name') or 'User'
-                last_name = emp_info.get('LAST_NAME') or emp_info.get('last_name') or ''
-                department = emp_info.get('DEPARTMENT') or emp_info.get('department') or 'Unknown'
+                first_name = emp_info.first_name or 'User'
+                last_name = emp_info.last_name or ''
+                department = emp_info.department or 'Unknown'
 
                 print_to_gui(f"👋 Welcome, {first_name} {last_name}!")
                 print_to_gui(f"   Department: {department}")
         else:
             print_to_gui("❌ Invalid QR code format")
 
-    api_call_thread(login_thread)
+    run_action("login", login_thread)
+
+
+def logout():
+    """End the session: cancel pending work and forget the employee's data"""
+    global current_emp_id, session_data, current_checkouts
+    if not current_emp_id and not task_runner.is_running("login"):
+        messagebox.showinfo("Info", "Nobody is logged in")
+        return
+
+    task_runner.cancel_all()
+    get_scanner().cancel()
+    response_cache.clear()
+    with history_stores_lock:
+        history_stores.clear()
+
+    current_emp_id = None
+    session_data = None
+    current_checkouts = []
+    print_to_gui("\n🔒 Logged out")
 
 
 def get_employee_info(emp_id):
     """Get employee information from API"""
     try:
-        response = make_api_request(f"{API_URL}/employee/{emp_id}")
-        if response.status_code == 200:
-            emp_data = response.json()
-            if isinstance(emp_data, dict) and 'items' in emp_data and emp_data['items']:
-                return emp_data['items'][0]
-            else:
-                return emp_data
+        return fetch_employee(emp_id)
+    except ApiStatusError:
+        return None
     except Exception as e:
         print_to_gui(f"❌ Error getting employee info: {e}")
         return None
-    return None
+
+
+def report_startup(gui_built, first_paint, opencv_loaded):
+    """Print how long start-up took (--profile-startup)"""
+    print("⏱️ Startup profile")
+    print(f"   Imports:      {(IMPORTS_FINISHED - STARTUP_STARTED) * 1000:8.1f} ms")
+    print(f"   Window built: {(gui_built - IMPORTS_FINISHED) * 1000:8.1f} ms")
+    print(f"   First paint:  {(first_paint - gui_built) * 1000:8.1f} ms")
+    print(f"   Total:        {(first_paint - STARTUP_STARTED) * 1000:8.1f} ms")
+    print(f"   OpenCV loaded before the window: {'yes' if opencv_loaded else 'no'}")
 
 
 def main():
     """Main application function"""
     global root
 
+    parser = argparse.ArgumentParser(description="Nexora equipment kiosk")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print import, window and first-paint timings")
+    parser.add_argument("--metrics-port", type=int, default=os.environ.get("EQUIPFLOW_METRICS_PORT"),
+                        help="serve timing metrics at http://HOST:PORT/metrics (Prometheus) and /metrics.json")
+    parser.add_argument("--metrics-host", default=os.environ.get("EQUIPFLOW_METRICS_HOST", "127.0.0.1"),
+                        help="address the metrics endpoint listens on")
+    parser.add_argument("--metrics-file", default=os.environ.get("EQUIPFLOW_METRICS_FILE"),
+                        help="also write the metrics to this file (JSON for *.json, Prometheus text otherwise)")
+    args = parser.parse_args()
+
+    if args.metrics_port is not None or args.metrics_file:
+        metrics.enable(port=args.metrics_port, path=args.metrics_file, host=args.metrics_host)
+
     # Create and run GUI
     root = create_gui()
+    if args.profile_startup:
+        gui_built = time.perf_counter()
+        opencv_loaded = "cv2" in sys.modules
+        root.update()  # map and draw the window now so first paint can be timed
+        report_startup(gui_built, time.perf_counter(), opencv_loaded)
     root.mainloop()
+    log_console.detach()
+
+    # Stop background work and release the webcam held by the scanner service
+    task_runner.shutdown()
+    shutdown_scanner()
+    if outbox is not None:
+        outbox.close()
+    close_snapshots()
+    metrics.shutdown()
+
+    saved = inflight.total_saved()
+    if saved:
+        print(f"♻️ Coalesced {saved} duplicate API request(s) this session")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,307 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import ords_client
+from records import InventoryItem
+from transport import Transport, POOL_MAXSIZE
+
+ACTIONS = ("checkout", "return", "audit")
+
+# Rows processed at the same time (each one holds a pooled connection while it runs)
+PARALLEL = 8
+
+# Seconds between progress lines on the console
+PROGRESS_INTERVAL = 5.0
+
+# Columns of the result log; the input columns come first so it can be fed back in
+RESULT_FIELDS = ("line", "action", "employee_id", "item_id", "booking_id", "notes", "is_damaged", "key",
+                 "status", "message", "ms")
+
+
+def read_rows(path, fmt=None):
+    """Yield (line number, row dict) from a CSV file with a header row or a JSONL file, streaming"""
+    fmt = fmt or ("jsonl" if path.lower().endswith((".jsonl", ".json")) else "csv")
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, {str(k).strip().lower(): (v or "").strip() for k, v in row.items() if k}
+            return
+
+        for number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, {"_error": f"Invalid JSON: {e}"}
+                continue
+            if not isinstance(row, dict):
+                yield number, {"_error": "Expected a JSON object"}
+                continue
+            yield number, {str(k).lower(): "" if v is None else str(v).strip() for k, v in row.items()}
+
+
+class RateLimiter:
+    """Token bucket: ``acquire`` blocks so that at most ``rate`` calls start per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class ResultLog:
+    """Writes one result per processed row, flushed straight away so a crash loses nothing"""
+
+    def __init__(self, path):
+        self.path = path
+        self._json = path.lower().endswith((".jsonl", ".json"))
+        self._file = open(path, "w", newline="", encoding="utf-8")
+        self._lock = threading.Lock()
+        if not self._json:
+            self._writer = csv.DictWriter(self._file, fieldnames=RESULT_FIELDS, extrasaction="ignore")
+            self._writer.writeheader()
+
+    def write(self, result):
+        with self._lock:
+            if self._json:
+                self._file.write(json.dumps({field: result.get(field, "") for field in RESULT_FIELDS}) + "\n")
+            else:
+                self._writer.writerow(result)
+            self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class RowError(Exception):
+    """A row that can't be processed as written"""
+
+
+class BatchRunner:
+    """Runs checkout, return and audit rows through the client's API code without a GUI.
+
+    Writes are built by the same payload functions as the kiosk dialogs and
+    sent with an Idempotency-Key derived from the row, so running a file
+    (or its result log) again doesn't repeat writes the server already has.
+    Unlike the kiosk they bypass the offline queue: a row that couldn't be
+    sent is reported as failed instead of being parked on this machine.
+    """
+
+    def __init__(self, source, dry_run=False, notes=""):
+        self.source = os.path.abspath(source)
+        self.dry_run = dry_run
+        self.notes = notes
+        self._inventory = None
+        self._inventory_lock = threading.Lock()
+
+    def inventory(self):
+        """Every inventory item by ID, fetched once per run"""
+        with self._inventory_lock:
+            if self._inventory is None:
+                rows = ords_client.fetch_collection(f"{ords_client.API_URL}/inventory")
+                self._inventory = {str(item.item_id): item for item in InventoryItem.from_rows(rows)}
+            return self._inventory
+
+    def key(self, number, row):
+        """Idempotency key: the row's own ``key`` column, or a hash of where and what the row is"""
+        if row.get("key"):
+            return row["key"]
+        content = json.dumps({field: row.get(field, "") for field in RESULT_FIELDS[1:7]}, sort_keys=True)
+        return hashlib.sha256(f"{self.source}:{number}:{content}".encode("utf-8")).hexdigest()[:32]
+
+    def run(self, number, row):
+        """Process one row and return its result (never raises)"""
+        result = dict(row, line=number, key=self.key(number, row))
+        started = time.perf_counter()
+        try:
+            if "_error" in row:
+                raise RowError(row["_error"])
+            if row.get("status") == "ok":
+                # A result log fed back in: only the rows that didn't succeed are run again
+                result.update(status="skipped", message="already done")
+                return result
+            action = row.get("action", "").lower()
+            if action not in ACTIONS:
+                raise RowError(f"Unknown action '{row.get('action', '')}' (expected {', '.join(ACTIONS)})")
+            status, message = getattr(self, f"do_{action}")(row, result)
+            result.update(status=status, message=message)
+        except RowError as e:
+            result.update(status="invalid", message=str(e))
+        except ords_client.NetworkError as e:
+            result.update(status="failed", message=f"Network error: {e}")
+        except Exception as e:
+            result.update(status="failed", message=str(e))
+        finally:
+            result["ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    @staticmethod
+    def employee(row):
+        emp_id = row.get("employee_id", "").upper().replace("EMP", "")
+        if not emp_id.isdigit():
+            raise RowError("employee_id must be a number (or EMP<number>)")
+        return emp_id
+
+    @staticmethod
+    def damaged(row):
+        value = (row.get("is_damaged") or "N").upper()[:1]
+        if value not in ("Y", "N"):
+            raise RowError("is_damaged must be Y or N")
+        return value
+
+    def send(self, path, payload, key):
+        response = ords_client.make_api_request(f"{ords_client.API_URL}/{path}", "POST", payload,
+                                                headers={"Idempotency-Key": key})
+        if response.status_code == 200:
+            return "ok", ""
+        return "failed", f"HTTP {response.status_code}: {ords_client.api_error(response)}"
+
+    def do_checkout(self, row, result):
+        emp_id = self.employee(row)
+        item_id = row.get("item_id")
+        if not item_id:
+            raise RowError("checkout needs an item_id")
+        data = {"item_id": item_id, "notes": row.get("notes") or self.notes, "is_damaged": self.damaged(row)}
+
+        if self.dry_run:
+            item = self.inventory().get(item_id)
+            if item is None:
+                return "failed", "Item not found"
+            if not item.is_available:
+                return "failed", f"Item is {item.status}"
+            return "dry-run", f"Would check out {item.item_name}"
+
+        return self.send("checkout", ords_client.checkout_payload(emp_id, data, f"EMP{emp_id}"), result["key"])
+
+    def do_return(self, row, result):
+        emp_id = self.employee(row)
+        booking_id = row.get("booking_id")
+        if not booking_id:
+            item_id = row.get("item_id")
+            if not item_id:
+                raise RowError("return needs a booking_id or an item_id")
+            booking = next((entry for entry in ords_client.sync_history(emp_id).open_checkouts()
+                            if str(entry.item_id) == item_id), None)
+            if booking is None:
+                return "failed", f"Employee {emp_id} has no open booking for {item_id}"
+            booking_id = result["booking_id"] = str(booking.booking_id)
+        if not str(booking_id).isdigit():
+            raise RowError("booking_id must be a number")
+        data = {"booking_id": booking_id, "notes": row.get("notes") or self.notes, "is_damaged": self.damaged(row)}
+
+        if self.dry_run:
+            return "dry-run", f"Would return booking {booking_id}"
+
+        return self.send("return", ords_client.return_payload(emp_id, data, f"EMP{emp_id}"), result["key"])
+
+    def do_audit(self, row, result):
+        """Stock-take: report an item's status, or what an employee still has out"""
+        item_id = row.get("item_id")
+        if item_id:
+            item = self.inventory().get(item_id)
+            if item is None:
+                return "failed", "Item not found"
+            return "ok", f"{item.item_name}: {item.status} (quantity {item.quantity})"
+
+        emp_id = self.employee(row)
+        checkouts = ords_client.sync_history(emp_id).open_checkouts()
+        if not checkouts:
+            return "ok", "Nothing checked out"
+        return "ok", f"{len(checkouts)} checked out: " + ", ".join(str(entry.item_id) for entry in checkouts)
+
+
+def default_results_path(source):
+    stem, extension = os.path.splitext(source)
+    return f"{stem}.results{'.jsonl' if extension.lower() in ('.jsonl', '.json') else '.csv'}"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run checkouts, returns and audits from a CSV or JSONL file without the kiosk window")
+    parser.add_argument("file", help="operations: action,employee_id,item_id,booking_id,notes,is_damaged")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from the extension)")
+    parser.add_argument("--results", help="per-row result log (default: <file>.results.csv or .jsonl)")
+    parser.add_argument("--parallel", type=int, default=PARALLEL, help="rows processed at the same time")
+    parser.add_argument("--rate", type=float, help="most rows started per second (default: no limit)")
+    parser.add_argument("--notes", default="", help="notes for rows that don't have their own")
+    parser.add_argument("--dry-run", action="store_true", help="check every row against the API but write nothing")
+    args = parser.parse_args()
+
+    if args.parallel < 1:
+        parser.error("--parallel must be at least 1")
+    if args.rate is not None and args.rate <= 0:
+        parser.error("--rate must be positive")
+
+    # One pooled connection per parallel row, so none are opened and thrown away
+    ords_client.transport = Transport(ords_client.HEADERS, verify=False,
+                                      pool_maxsize=max(args.parallel, POOL_MAXSIZE))
+
+    runner = BatchRunner(args.file, dry_run=args.dry_run, notes=args.notes)
+    limiter = RateLimiter(args.rate) if args.rate else None
+    log = ResultLog(args.results or default_results_path(args.file))
+    counts = {}
+    counts_lock = threading.Lock()
+    # Keep a bounded number of rows in flight so huge files are streamed, not loaded
+    slots = threading.BoundedSemaphore(args.parallel * 2)
+    started = last_progress = time.monotonic()
+
+    def process(number, row):
+        try:
+            if limiter is not None:
+                limiter.acquire()
+            result = runner.run(number, row)
+            log.write(result)
+            with counts_lock:
+                counts[result["status"]] = counts.get(result["status"], 0) + 1
+            if result["status"] in ("failed", "invalid"):
+                print(f"❌ Line {number} ({result.get('action') or '?'}): {result['message']}")
+        finally:
+            slots.release()
+
+    mode = "Checking" if args.dry_run else "Processing"
+    print(f"🔄 {mode} {args.file} with {args.parallel} in parallel"
+          + (f", at most {args.rate:g} rows/s" if args.rate else ""))
+    try:
+        with ThreadPoolExecutor(max_workers=args.parallel, thread_name_prefix="batch") as pool:
+            for number, row in read_rows(args.file, args.format):
+                slots.acquire()
+                pool.submit(process, number, row)
+                now = time.monotonic()
+                if now - last_progress >= PROGRESS_INTERVAL:
+                    last_progress = now
+                    with counts_lock:
+                        done = sum(counts.values())
+                    print(f"⏳ {done} rows done ({done / (now - started) * 60:.0f}/min)")
+    except KeyboardInterrupt:
+        print("👋 Interrupted - rows already started were finished and logged")
+    finally:
+        log.close()
+        ords_client.close_snapshots()
+
+    elapsed = time.monotonic() - started
+    total = sum(counts.values())
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items())) or "nothing to do"
+    print(f"📋 {total} rows in {elapsed:.1f}s ({total / elapsed * 60 if elapsed else 0:.0f}/min): {summary}")
+    print(f"📄 Results written to {log.path}")
+    sys.exit(1 if counts.get("failed") or counts.get("invalid") else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import glob
+import os
+import threading
+import time
+
+import cv2
+import numpy as np
+
+import qr_scanner
+
+# Frame rate and size the fake camera pretends to deliver
+FPS = 30
+FRAME_SIZE = (640, 480)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EMPLOYEE_QR_GLOB = os.path.join(HERE, "..", "QR Code - Employees", "*.jpg")
+ITEM_QR_GLOB = os.path.join(HERE, "..", "QR Code - Oracle APEX Add Items", "*.png")
+
+# Marker for "cycle through every image" (see FakeCamera.cycle)
+_CYCLE = object()
+
+
+def repo_qr_images():
+    """Paths of every QR image that ships with the repository"""
+    return sorted(glob.glob(EMPLOYEE_QR_GLOB)) + sorted(glob.glob(ITEM_QR_GLOB))
+
+
+def compose_frame(image, frame_size=FRAME_SIZE, scale=0.6):
+    """Place a QR image on a white frame, like a code held up to the webcam"""
+    width, height = frame_size
+    frame = np.full((height, width, 3), 255, dtype=np.uint8)
+    if image.ndim == 2:
+        image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+    factor = scale * min(width / image.shape[1], height / image.shape[0])
+    code = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    top = (height - code.shape[0]) // 2
+    left = (width - code.shape[1]) // 2
+    frame[top:top + code.shape[0], left:left + code.shape[1]] = code
+    return frame
+
+
+class FakeCamera:
+    """Replays QR images as webcam frames through the cv2.VideoCapture API.
+
+    Frames are paced at ``fps`` like a real camera. ``show`` picks which
+    image is "held up" (None shows an empty frame); by default the images
+    are cycled, each for ``hold`` frames (see ``cycle``).
+    """
+
+    def __init__(self, images=None, fps=FPS, frame_size=FRAME_SIZE, hold=15):
+        self.fps = fps
+        self.hold = hold
+        self.frame_size = frame_size
+        self.frames = {}
+        for path in images or repo_qr_images():
+            image = cv2.imread(path)
+            if image is not None:
+                self.frames[path] = compose_frame(image, frame_size)
+        self.blank = np.full((frame_size[1], frame_size[0], 3), 255, dtype=np.uint8)
+        self._showing = _CYCLE
+        self._count = 0
+        self._next_frame = time.monotonic()
+        self._opened = True
+        self._lock = threading.Lock()
+
+    def show(self, path):
+        """Hold up one image from now on (None: nothing in front of the camera)"""
+        with self._lock:
+            self._showing = path
+
+    def cycle(self):
+        """Go back to cycling through every image"""
+        with self._lock:
+            self._showing = _CYCLE
+
+    def _current(self):
+        with self._lock:
+            showing = self._showing
+        if showing is _CYCLE:
+            if not self.frames:
+                return self.blank
+            paths = list(self.frames)
+            return self.frames[paths[(self._count // self.hold) % len(paths)]]
+        if showing is None:
+            return self.blank
+        if showing not in self.frames:
+            self.frames[showing] = compose_frame(cv2.imread(showing), self.frame_size)
+        return self.frames[showing]
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        delay = self._next_frame - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self._next_frame = max(self._next_frame, time.monotonic() - 1.0 / self.fps) + 1.0 / self.fps
+
+        frame = self._current()
+        self._count += 1
+        if image is not None and image.shape == frame.shape:
+            np.copyto(image, frame)
+            return True, image
+        return True, frame.copy()
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return float(self.fps)
+        return 0.0
+
+    def release(self):
+        self._opened = False
+
+
+def install(camera=None):
+    """Make the QR scanner read from a FakeCamera instead of the webcam; returns the camera"""
+    camera = camera or FakeCamera()
+
+    def open_fake(device):
+        camera._opened = True
+        return camera
+
+    qr_scanner._open_camera = open_fake
+    return camera
@@ -0,0 +1,86 @@
+import threading
+
+
+def _booking_key(entry):
+    """Sort key for booking IDs that may arrive as numbers or strings"""
+    try:
+        return 0, int(entry.booking_id)
+    except (TypeError, ValueError):
+        return 1, str(entry.booking_id)
+
+
+class HistoryStore:
+    """Local copy of one employee's booking history, kept current with delta queries.
+
+    Bookings are identified by BOOKING_ID, which only ever grows, and a
+    booking only changes once: when it is returned. So after a full
+    download, the only rows worth asking ORDS for are bookings newer than
+    the highest ID seen (``cursor``) and the bookings that are still open.
+    ``delta_query`` builds that ORDS ``q`` filter. ``merge`` folds the
+    answer in and keeps an index of open bookings, so the Return dialog
+    never has to scan the whole history.
+
+    The cursor only moves forward in ``commit``, once a sync has read every
+    page, so an interrupted sync just repeats part of its work next time.
+    """
+
+    def __init__(self, entries=()):
+        self._entries = {}
+        self._open = set()
+        self.cursor = None
+        self._cursor_key = None
+        self.synced_at = None
+        self.lock = threading.Lock()
+        self.merge(entries)
+        if self._entries:
+            self.commit()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def merge(self, entries):
+        """Add new bookings and apply changes to known ones; returns how many changed"""
+        changed = 0
+        for entry in entries:
+            if entry.booking_id is None:
+                continue
+            old = self._entries.get(entry.booking_id)
+            if old is not None and old.to_dict() == entry.to_dict():
+                continue
+            self._entries[entry.booking_id] = entry
+            if entry.is_open:
+                self._open.add(entry.booking_id)
+            else:
+                self._open.discard(entry.booking_id)
+            changed += 1
+        return changed
+
+    def commit(self, synced_at=None):
+        """Record that every booking up to the highest ID held has been seen"""
+        if self._entries:
+            latest = max(self._entries.values(), key=_booking_key)
+            self.cursor, self._cursor_key = latest.booking_id, _booking_key(latest)
+        self.synced_at = synced_at
+
+    def delta_query(self):
+        """ORDS ``q`` filter for rows that are new or may have changed (None: fetch everything)"""
+        if self.cursor is None:
+            return None
+        newer = {"booking_id": {"$gt": self.cursor}}
+        query = {"$or": [newer, {"booking_id": {"$in": [entry.booking_id for entry in self.open_checkouts()]}}]} if self._open else newer
+        query["$orderby"] = {"booking_id": "ASC"}
+        return query
+
+    def is_delta(self, entry):
+        """True for rows ``delta_query`` asks for (used to re-check a filter the server ignored)"""
+        if self.cursor is None or entry.booking_id in self._open:
+            return True
+        return _booking_key(entry) > self._cursor_key
+
+    def entries(self):
+        """Every booking, oldest first"""
+        return sorted(self._entries.values(), key=_booking_key)
+
+    def open_checkouts(self):
+        """Bookings that haven't been returned yet, oldest first"""
+        return sorted((self._entries[booking_id] for booking_id in self._open), key=_booking_key)
@@ -0,0 +1,208 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from benchmark import percentile
+from mock_ords import MockOrds
+
+# Concurrent kiosks at each step of the ramp
+LEVELS = (1, 2, 4, 8, 16)
+
+# Seconds each step of the ramp runs for
+DURATION = 20
+
+# Mean pause between a kiosk's sessions, like the gap between employees (seconds)
+THINK_TIME = 1.0
+
+# Chance that a session returns an item instead of checking one out (when it has one)
+RETURN_RATIO = 0.5
+
+# Mock inventory per simulated kiosk, so kiosks rarely fight over one item
+ITEMS_PER_KIOSK = 20
+
+
+def classify(messages):
+    """Outcome of one operation from the messages the client printed"""
+    if any(message.lstrip().startswith("❌") for message in messages):
+        return "error"
+    if any(message.lstrip().startswith("📥") for message in messages):
+        return "queued"
+    return "ok"
+
+
+def kiosk(url, emp_id, duration, think, writes, seed, start, results):
+    """One simulated kiosk: runs login -> history -> checkout/return sessions for ``duration`` seconds.
+
+    Runs in its own process, so every kiosk has its own caches, connection
+    pool, circuit breaker and offline queue, exactly like a real station.
+    """
+    state = tempfile.mkdtemp(prefix="equipflow-kiosk-")
+    os.environ["EQUIPFLOW_API_URL"] = url
+    os.environ["EQUIPFLOW_QUEUE_FILE"] = os.path.join(state, "outbox.db")
+    os.environ["EQUIPFLOW_SNAPSHOT_FILE"] = os.path.join(state, "snapshot.db")
+
+    import equipflow_app as app
+
+    messages = []
+    app.log_console.write = messages.append
+    app.scan_qr_code = lambda: f"EMP{emp_id}"  # QR scanning is stubbed out
+    rng = random.Random(seed)
+    samples = []
+
+    def measure(operation, function, *args):
+        del messages[:]
+        started = time.perf_counter()
+        try:
+            function(*args)
+            outcome = classify(messages)
+        except Exception:
+            outcome = "error"
+        samples.append((operation, (time.perf_counter() - started) * 1000, outcome))
+
+    def login():
+        app.current_emp_id = emp_id
+        app.session_data = app.SessionStore(emp_id)
+        app.session_data.prefetch()
+        for name in ("employee", "checkouts", "inventory"):
+            app.session_data.wait(name)
+
+    def checkout():
+        inventory = app.session_data.wait("inventory") or []
+        if not inventory:
+            messages.append("❌ Nothing available to check out")
+            return
+        item = rng.choice(inventory)
+        app.process_checkout(emp_id, {"item_id": item.item_id, "notes": "load test", "is_damaged": "N"})
+
+    def do_return():
+        checkouts = app.session_data.wait("checkouts") or []
+        if not checkouts:
+            messages.append("❌ Nothing to return")
+            return
+        booking = rng.choice(checkouts)
+        app.process_return(emp_id, {"booking_id": booking.booking_id, "notes": "load test", "is_damaged": "N"})
+
+    # Every kiosk starts at once, after they have all finished importing the client
+    start.wait()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        measure("login", login)
+        measure("history", app.view_history, emp_id)
+        if writes:
+            if app.session_data.get("checkouts") and rng.random() < RETURN_RATIO:
+                measure("return", do_return)
+            else:
+                measure("checkout", checkout)
+
+        # Log out: the next session starts cold, like a new employee at the kiosk
+        app.response_cache.clear()
+        with app.history_stores_lock:
+            app.history_stores.clear()
+        time.sleep(min(rng.expovariate(1 / think) if think else 0, max(0.0, deadline - time.monotonic())))
+
+    app.get_outbox().close()
+    results.put(samples)
+
+
+def run_level(url, employee_ids, kiosks, duration, think, writes):
+    """Run ``kiosks`` concurrent kiosks for ``duration`` seconds; returns every sample"""
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    start = context.Barrier(kiosks)
+    processes = [context.Process(target=kiosk, daemon=True,
+                                 args=(url, str(employee_ids[i % len(employee_ids)]), duration,
+                                       think, writes, i, start, results))
+                 for i in range(kiosks)]
+    for process in processes:
+        process.start()
+
+    samples = []
+    for _ in processes:
+        samples.extend(results.get())
+    for process in processes:
+        process.join()
+    return samples
+
+
+def summarize(kiosks, samples, duration):
+    latencies = [latency for _, latency, _ in samples]
+    errors = sum(1 for _, _, outcome in samples if outcome == "error")
+    queued = sum(1 for _, _, outcome in samples if outcome == "queued")
+    sessions = sum(1 for operation, _, _ in samples if operation == "login")
+    row = {
+        "kiosks": kiosks,
+        "sessions_per_s": round(sessions / duration, 2),
+        "ops_per_s": round(len(samples) / duration, 2),
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "queued": queued,
+        "p50_ms": round(percentile(latencies, 50), 1) if samples else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if samples else None,
+        "p99_ms": round(percentile(latencies, 99), 1) if samples else None,
+        "operations": {},
+    }
+    for operation in sorted({operation for operation, _, _ in samples}):
+        values = [latency for op, latency, _ in samples if op == operation]
+        failed = sum(1 for op, _, outcome in samples if op == operation and outcome == "error")
+        row["operations"][operation] = {"count": len(values), "errors": failed,
+                                        "p95_ms": round(percentile(values, 95), 1)}
+    return row
+
+
+def print_row(row):
+    if row["p50_ms"] is None:
+        print(f"{row['kiosks']:>6}   (no operations completed)")
+        return
+    details = "  ".join(f"{op} {stats['p95_ms']}" for op, stats in row["operations"].items())
+    print(f"{row['kiosks']:>6}{row['sessions_per_s']:>11}{row['ops_per_s']:>8}{row['error_rate'] * 100:>8.1f}%"
+          f"{row['queued']:>8}{row['p50_ms']:>9}{row['p95_ms']:>9}{row['p99_ms']:>9}   {details}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many kiosks against the ORDS API and ramp the load")
+    parser.add_argument("--url", help="API to load (default: start a local mock server)")
+    parser.add_argument("--employees", nargs="+", help="employee IDs the kiosks log in as (needed with --url)")
+    parser.add_argument("--levels", nargs="+", type=int, default=list(LEVELS), help="concurrent kiosks per step")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds per step")
+    parser.add_argument("--think", type=float, default=THINK_TIME, help="mean pause between sessions (s)")
+    parser.add_argument("--latency", type=float, default=0.05, help="mock server latency per request (s)")
+    parser.add_argument("--writes", action="store_true",
+                        help="also check out and return items (always on with the mock server)")
+    parser.add_argument("--json", metavar="FILE", help="write the results as JSON")
+    args = parser.parse_args()
+
+    mock = None
+    if args.url:
+        url, employee_ids, writes = args.url, args.employees, args.writes
+        if not employee_ids:
+            parser.error("--employees is required with --url")
+        if not writes:
+            print("ℹ️ Read-only run (login and history); add --writes to check out and return items too")
+    else:
+        mock = MockOrds(latency=args.latency, items=max(ITEMS_PER_KIOSK * max(args.levels), 200)).start()
+        url, writes = mock.url, True
+        employee_ids = [employee["EMPLOYEE_ID"] for employee in mock.employees]
+        print(f"🧪 Using a local mock server ({args.latency * 1000:.0f} ms latency): {url}")
+
+    print(f"\n{'Kiosks':>6}{'Sessions/s':>11}{'Ops/s':>8}{'Errors':>9}{'Queued':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}   p95 ms by operation")
+    rows = []
+    try:
+        for kiosks in args.levels:
+            samples = run_level(url, employee_ids, kiosks, args.duration, args.think, writes)
+            rows.append(summarize(kiosks, samples, args.duration))
+            print_row(rows[-1])
+    finally:
+        if mock is not None:
+            mock.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "levels": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
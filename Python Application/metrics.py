@@ -0,0 +1,271 @@
+import bisect
+import functools
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Histogram bucket upper bounds in seconds (from one decoded frame up to a slow ORDS page)
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# How often the metrics file is rewritten (seconds)
+WRITE_INTERVAL = 15
+
+# Nothing is collected until enable() is called; until then every call below returns at once
+enabled = False
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+_histograms = {}
+_server = None
+_writer = None
+_path = None
+_stop = threading.Event()
+
+
+class _Histogram:
+    __slots__ = ("buckets", "count", "total")
+
+    def __init__(self):
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+
+
+def _key(name, labels):
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    """Add to a counter (names end in ``_total``)"""
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    if not enabled:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _gauges[key] = value
+
+
+def observe(name, seconds, **labels):
+    """Record a duration in the histogram ``name`` (names end in ``_seconds``)"""
+    if not enabled:
+        return
+    key = _key(name, labels)
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = _Histogram()
+        if index < len(BUCKETS):
+            histogram.buckets[index] += 1
+        histogram.count += 1
+        histogram.total += seconds
+
+
+class Span:
+    """Times a block into ``<name>_seconds``; an exception also counts ``<name>_errors_total``.
+
+    Labels can still be added with ``set`` before the block ends, e.g. the
+    outcome of a scan.
+    """
+
+    __slots__ = ("name", "labels", "started")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.started = None
+
+    def set(self, **labels):
+        self.labels.update(labels)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        observe(f"{self.name}_seconds", time.perf_counter() - self.started, **self.labels)
+        if exc_type is not None:
+            inc(f"{self.name}_errors_total", **self.labels)
+        return False
+
+
+class _NullSpan:
+    """What ``span`` hands out while metrics are disabled: does nothing"""
+
+    __slots__ = ()
+
+    def set(self, **labels):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, **labels):
+    """Context manager timing a block (see Span)"""
+    if not enabled:
+        return _NULL_SPAN
+    return Span(name, labels)
+
+
+def timed(name, **labels):
+    """Decorator timing every call of a function (see Span)"""
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            with Span(name, dict(labels)):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n") for _, value in labels)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + "}"
+
+
+def _copy():
+    with _lock:
+        histograms = {}
+        for key, histogram in _histograms.items():
+            copy = histograms[key] = _Histogram()
+            copy.buckets, copy.count, copy.total = list(histogram.buckets), histogram.count, histogram.total
+        return dict(_counters), dict(_gauges), histograms
+
+
+def render_prometheus():
+    """Every metric in the Prometheus text exposition format"""
+    counters, gauges, histograms = _copy()
+    lines = []
+    declared = set()
+
+    def declare(name, kind):
+        if name not in declared:
+            declared.add(name)
+            lines.append(f"# TYPE {name} {kind}")
+
+    for (name, labels), value in sorted(counters.items()):
+        declare(name, "counter")
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    for (name, labels), value in sorted(gauges.items()):
+        declare(name, "gauge")
+        lines.append(f"{name}{_format_labels(labels)} {value:g}")
+    for (name, labels), histogram in sorted(histograms.items()):
+        declare(name, "histogram")
+        cumulative = 0
+        for bound, count in zip(BUCKETS, histogram.buckets):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', f'{bound:g}'),))} {cumulative}")
+        lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram.count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+def render_json():
+    """Every metric as JSON (histogram buckets are cumulative, like Prometheus)"""
+    counters, gauges, histograms = _copy()
+    result = {"timestamp": time.time(), "counters": [], "gauges": [], "histograms": []}
+    for (name, labels), value in sorted(counters.items()):
+        result["counters"].append({"name": name, "labels": dict(labels), "value": value})
+    for (name, labels), value in sorted(gauges.items()):
+        result["gauges"].append({"name": name, "labels": dict(labels), "value": value})
+    for (name, labels), histogram in sorted(histograms.items()):
+        cumulative, buckets = 0, {}
+        for bound, count in zip(BUCKETS, histogram.buckets):
+            cumulative += count
+            buckets[f"{bound:g}"] = cumulative
+        result["histograms"].append({"name": name, "labels": dict(labels), "count": histogram.count,
+                                     "sum": round(histogram.total, 6), "buckets": buckets})
+    return json.dumps(result, indent=2)
+
+
+def write_file(path):
+    """Write every metric to ``path`` (JSON for *.json, Prometheus text otherwise)"""
+    text = render_json() if path.endswith(".json") else render_prometheus()
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as f:
+        f.write(text)
+    # Replace in one step so a scraper never reads half a file
+    os.replace(temporary, path)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0] == "/metrics.json":
+            body, content_type = render_json(), "application/json"
+        elif self.path.split("?")[0] in ("/", "/metrics"):
+            body, content_type = render_prometheus(), "text/plain; version=0.0.4"
+        else:
+            self.send_error(404)
+            return
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _write_periodically(path, interval):
+    while not _stop.wait(interval):
+        try:
+            write_file(path)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics to {path}: {e}")
+
+
+def enable(port=None, path=None, host="127.0.0.1", interval=WRITE_INTERVAL):
+    """Start collecting, served at http://host:port/metrics and/or written to ``path``"""
+    global enabled, _server, _writer, _path
+    enabled = True
+    if port is not None and _server is None:
+        _server = ThreadingHTTPServer((host, port), _Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    if path and _writer is None:
+        _path = path
+        _stop.clear()
+        _writer = threading.Thread(target=_write_periodically, args=(path, interval),
+                                   name="metrics-writer", daemon=True)
+        _writer.start()
+
+
+def shutdown():
+    """Stop the endpoint and writer, writing the file one last time"""
+    global _server, _writer
+    if _server is not None:
+        _server.shutdown()
+        _server.server_close()
+        _server = None
+    if _writer is not None:
+        _stop.set()
+        _writer.join(timeout=2)
+        _writer = None
+        try:
+            write_file(_path)
+        except OSError as e:
+            print(f"⚠️ Could not write metrics to {_path}: {e}")
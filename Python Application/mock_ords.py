@@ -0,0 +1,339 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs, urlencode
+
+# Rows per page when the client doesn't ask for a limit (ORDS uses 25 by default)
+PAGE_SIZE = 25
+
+# Size of the generated data set
+EMPLOYEES = 50
+ITEMS = 200
+BOOKINGS_PER_EMPLOYEE = 100
+
+# Fraction of generated bookings that are still checked out
+OPEN_BOOKINGS = 0.05
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+EMPLOYEE_QR_DIR = os.path.join(HERE, "..", "QR Code - Employees")
+ITEM_QR_DIR = os.path.join(HERE, "..", "QR Code - Oracle APEX Add Items")
+
+CATEGORIES = ("Laptops", "Cameras", "Audio", "Networking", "Single-board computers", "Tools")
+DEPARTMENTS = ("IT", "Engineering", "Media", "Operations", "Research")
+
+
+def repo_employees():
+    """(id, first name, last name) of the employees whose QR codes ship with the repo"""
+    employees = []
+    for path in sorted(glob.glob(os.path.join(EMPLOYEE_QR_DIR, "*.jpg"))):
+        match = re.match(r"(.+?) - (\d+)$", os.path.splitext(os.path.basename(path))[0])
+        if match:
+            first, _, last = match.group(1).partition(" ")
+            employees.append((int(match.group(2)), first, last))
+    return employees
+
+
+def repo_items():
+    """IDs of the items whose QR codes ship with the repo"""
+    return [os.path.splitext(os.path.basename(path))[0][len("QR_"):]
+            for path in sorted(glob.glob(os.path.join(ITEM_QR_DIR, "QR_*.png")))]
+
+
+def _matches(row, query):
+    """Evaluate the subset of the ORDS ``q`` filter syntax the client uses"""
+    for key, condition in query.items():
+        if key == "$orderby":
+            continue
+        if key == "$or":
+            if not any(_matches(row, part) for part in condition):
+                return False
+            continue
+        if key == "$and":
+            if not all(_matches(row, part) for part in condition):
+                return False
+            continue
+
+        value = row.get(key.upper())
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        for op, argument in condition.items():
+            if op == "$eq" and value != argument:
+                return False
+            if op == "$ne" and value == argument:
+                return False
+            if op == "$null" and value is not None:
+                return False
+            if op == "$notnull" and value is None:
+                return False
+            if op in ("$gt", "$lt", "$gte", "$lte"):
+                if value is None:
+                    return False
+                if op == "$gt" and not value > argument:
+                    return False
+                if op == "$lt" and not value < argument:
+                    return False
+                if op == "$gte" and not value >= argument:
+                    return False
+                if op == "$lte" and not value <= argument:
+                    return False
+            if op == "$in" and value not in argument:
+                return False
+    return True
+
+
+class MockOrds:
+    """Local stand-in for the ORDS API, for benchmarks and offline development.
+
+    Serves the same endpoints as the real service - ``/employees``,
+    ``/employee/{id}``, ``/history/{id}``, ``/inventory``, ``/checkout`` and
+    ``/return`` - with ORDS-style pagination, ``q`` filters, ETags and
+    Idempotency-Key handling. ``latency`` (seconds) is added to every
+    response, and ``stats`` counts requests and bytes per endpoint.
+
+    The data set always contains the employees and items whose QR codes are
+    in the repository, padded with generated ones up to the requested size.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, page_size=PAGE_SIZE,
+                 employees=EMPLOYEES, items=ITEMS, bookings=BOOKINGS_PER_EMPLOYEE,
+                 support_filters=True, seed=0):
+        self.latency = latency
+        self.page_size = page_size
+        self.support_filters = support_filters
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        self._idempotency = {}
+        self._generate(random.Random(seed), employees, items, bookings)
+
+        handler = type("Handler", (_Handler,), {"mock": self})
+        self._server = ThreadingHTTPServer((host, port), handler)
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/ords/nexora/api"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-ords", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.clear()
+
+    def request_count(self):
+        with self._lock:
+            return self.stats["requests"]
+
+    def _generate(self, rng, employee_count, item_count, bookings_per_employee):
+        people = repo_employees()
+        next_id = 1000
+        while len(people) < employee_count:
+            next_id += 1
+            if all(employee_id != next_id for employee_id, _, _ in people):
+                people.append((next_id, f"Employee{next_id}", "Test"))
+        self.employees = [{"EMPLOYEE_ID": employee_id, "FIRST_NAME": first, "LAST_NAME": last,
+                           "DEPARTMENT": rng.choice(DEPARTMENTS)} for employee_id, first, last in people]
+
+        item_ids = repo_items()
+        while len(item_ids) < item_count:
+            item_ids.append(f"ITEM-{len(item_ids) + 1:05d}")
+        self.inventory = [{"ITEM_ID": item_id, "ITEM_NAME": f"Equipment {item_id}",
+                           "CATEGORY": rng.choice(CATEGORIES), "QUANTITY": 1, "STATUS": "Available"}
+                          for item_id in item_ids]
+
+        self.bookings = []
+        for employee in self.employees:
+            for _ in range(bookings_per_employee):
+                item = rng.choice(self.inventory)
+                day = rng.randint(1, 28)
+                is_open = rng.random() < OPEN_BOOKINGS and item["STATUS"] == "Available"
+                if is_open:
+                    item["STATUS"] = "Checked Out"
+                self.bookings.append({
+                    "BOOKING_ID": len(self.bookings) + 1,
+                    "EMPLOYEE_ID": employee["EMPLOYEE_ID"],
+                    "ITEM_ID": item["ITEM_ID"],
+                    "ITEM_NAME": item["ITEM_NAME"],
+                    "CATEGORY": item["CATEGORY"],
+                    "DATE_BOOKED": f"2024-{rng.randint(1, 12):02d}-{day:02d}",
+                    "DATE_RETURNED": None if is_open else f"2024-12-{day:02d}",
+                    "STATUS": "Checked Out" if is_open else "Returned",
+                    "RETURN_NOTES": None,
+                })
+
+    # Request handling (called from the server threads)
+
+    def collection(self, path):
+        """Rows for a GET path, or None if the path doesn't exist"""
+        with self._lock:
+            if path == "/employees":
+                return list(self.employees)
+            if path == "/inventory":
+                return [dict(item) for item in self.inventory]
+            match = re.fullmatch(r"/employee/(\d+)", path)
+            if match:
+                return [e for e in self.employees if e["EMPLOYEE_ID"] == int(match.group(1))]
+            match = re.fullmatch(r"/history/(\d+)", path)
+            if match:
+                return [dict(b) for b in self.bookings if b["EMPLOYEE_ID"] == int(match.group(1))]
+        return None
+
+    def write(self, path, payload, key):
+        """Apply a checkout or return; returns (status, body)"""
+        with self._lock:
+            if key and key in self._idempotency:
+                return self._idempotency[key]
+            if path == "/checkout":
+                result = self._checkout(payload)
+            elif path == "/return":
+                result = self._return(payload)
+            else:
+                result = 404, {"error": "Not found"}
+            if key:
+                self._idempotency[key] = result
+            return result
+
+    def _checkout(self, payload):
+        item = next((i for i in self.inventory if i["ITEM_ID"] == payload.get("item_id")), None)
+        if item is None:
+            return 404, {"error": "Unknown item"}
+        if item["STATUS"] != "Available":
+            return 400, {"error": "Item is not available"}
+        item["STATUS"] = "Checked Out"
+        booking = {"BOOKING_ID": len(self.bookings) + 1, "EMPLOYEE_ID": int(payload["employee_id"]),
+                   "ITEM_ID": item["ITEM_ID"], "ITEM_NAME": item["ITEM_NAME"], "CATEGORY": item["CATEGORY"],
+                   "DATE_BOOKED": time.strftime("%Y-%m-%d"), "DATE_RETURNED": None,
+                   "STATUS": "Checked Out", "RETURN_NOTES": payload.get("checkout_notes")}
+        self.bookings.append(booking)
+        return 200, {"booking_id": booking["BOOKING_ID"]}
+
+    def _return(self, payload):
+        booking = next((b for b in self.bookings if b["BOOKING_ID"] == payload.get("booking_id")), None)
+        if booking is None or booking["EMPLOYEE_ID"] != payload.get("employee_id"):
+            return 404, {"error": "Unknown booking"}
+        if booking["DATE_RETURNED"] is not None:
+            return 400, {"error": "Already returned"}
+        booking["DATE_RETURNED"] = time.strftime("%Y-%m-%d")
+        booking["STATUS"] = "Returned"
+        booking["RETURN_NOTES"] = payload.get("return_notes")
+        for item in self.inventory:
+            if item["ITEM_ID"] == booking["ITEM_ID"]:
+                item["STATUS"] = "Available"
+        return 200, {"booking_id": booking["BOOKING_ID"]}
+
+    def count(self, path, size):
+        endpoint = re.sub(r"/\d+$", "/{id}", path)
+        with self._lock:
+            self.stats["requests"] += 1
+            self.stats[f"requests {endpoint}"] += 1
+            self.stats["bytes"] += size
+
+
+class _Handler(BaseHTTPRequestHandler):
+    mock = None
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+    def log_message(self, format, *args):
+        pass
+
+    def _path(self):
+        path = urlsplit(self.path).path
+        prefix = urlsplit(self.mock.url).path
+        return path[len(prefix):] if path.startswith(prefix) else None
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+        self.mock.count(self._path() or self.path, len(data))
+
+    def do_GET(self):
+        time.sleep(self.mock.latency)
+        path = self._path()
+        params = parse_qs(urlsplit(self.path).query)
+        rows = self.mock.collection(path) if path is not None else None
+        if rows is None:
+            return self._send(404, {"error": "Not found"})
+
+        if "q" in params and self.mock.support_filters:
+            try:
+                query = json.loads(params["q"][0])
+            except ValueError:
+                return self._send(400, {"error": "Invalid q"})
+            rows = [row for row in rows if _matches(row, query)]
+            for column, direction in query.get("$orderby", {}).items():
+                rows.sort(key=lambda row: (row.get(column.upper()) is None, row.get(column.upper())),
+                          reverse=str(direction).upper() == "DESC")
+
+        offset = int(params.get("offset", ["0"])[0])
+        limit = int(params.get("limit", [str(self.mock.page_size)])[0])
+        page = rows[offset:offset + limit]
+        body = {"items": page, "hasMore": offset + limit < len(rows),
+                "limit": limit, "offset": offset, "count": len(page), "links": []}
+        if body["hasMore"]:
+            query = {key: values[0] for key, values in params.items()}
+            query.update(offset=offset + limit, limit=limit)
+            body["links"].append({"rel": "next", "href": f"{self.mock.url}{path}?{urlencode(query)}"})
+
+        etag = '"' + hashlib.md5(json.dumps(body, sort_keys=True).encode()).hexdigest() + '"'
+        if self.headers.get("If-None-Match") == etag:
+            return self._send(304, None, {"ETag": etag})
+        self._send(200, body, {"ETag": etag})
+
+    def do_POST(self):
+        time.sleep(self.mock.latency)
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send(400, {"error": "Invalid JSON"})
+        status, body = self.mock.write(self._path(), payload, self.headers.get("Idempotency-Key"))
+        self._send(status, body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Nexora ORDS API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--page-size", type=int, default=PAGE_SIZE)
+    parser.add_argument("--employees", type=int, default=EMPLOYEES)
+    parser.add_argument("--items", type=int, default=ITEMS)
+    parser.add_argument("--bookings", type=int, default=BOOKINGS_PER_EMPLOYEE, help="history rows per employee")
+    parser.add_argument("--no-filters", action="store_true", help="ignore ORDS q filters like an old endpoint")
+    args = parser.parse_args()
+
+    mock = MockOrds(args.host, args.port, args.latency, args.page_size, args.employees, args.items,
+                    args.bookings, support_filters=not args.no_filters)
+    print(f"🧪 Mock ORDS serving {len(mock.employees)} employees, {len(mock.inventory)} items "
+          f"and {len(mock.bookings)} bookings")
+    print(f"   EQUIPFLOW_API_URL={mock.url}")
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
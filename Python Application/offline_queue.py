@@ -0,0 +1,254 @@
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+
+# Where queued writes are kept until the API has accepted them
+QUEUE_FILE = os.environ.get("EQUIPFLOW_QUEUE_FILE",
+                            os.path.join(os.path.expanduser("~"), ".equipflow", "outbox.db"))
+
+# Retry delays for the replayer: doubles after every failed attempt (seconds)
+BACKOFF_BASE = 2
+BACKOFF_MAX = 60
+
+# Responses that mean "try again later" rather than "the server said no"
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Times the API may fail one write (not counting "unreachable") before it is dropped so it stops blocking the queue
+MAX_ATTEMPTS = 8
+
+
+class QueuedWrite:
+    """One write waiting in the outbox"""
+
+    __slots__ = ("key", "url", "payload", "created", "attempts", "rejections", "last_error")
+
+    def __init__(self, key, url, payload, created, attempts, rejections, last_error):
+        self.key = key
+        self.url = url
+        self.payload = json.loads(payload)
+        self.created = created
+        self.attempts = attempts
+        self.rejections = rejections  # failed attempts that reached the API
+        self.last_error = last_error
+
+
+class OfflineQueue:
+    """Durable SQLite write-ahead queue for POSTs that must not be lost.
+
+    Every write is stored on disk, with a client-generated idempotency key,
+    before it is sent. If the API can't be reached (``send`` raises one of
+    ``retry_on``, or answers with a status in RETRY_STATUSES) the write stays
+    queued. A background replayer then sends the queue oldest-first with
+    exponential backoff. While older writes are waiting, new ones go to the
+    back of the queue so they are delivered in the order they were made.
+
+    Any other error from ``send`` is not retried when the write is first
+    submitted: the write is dropped and the error re-raised to the caller.
+    During replay it counts as a rejection, like a RETRY_STATUSES answer;
+    after MAX_ATTEMPTS rejections the write is dropped. Failures to reach
+    the API are never counted, however long an outage lasts.
+
+    ``send(url, payload, key)`` performs the request and returns the response.
+    ``on_result(write, response)`` is called for every replayed write the
+    server answered, ``on_error(write, error)`` for every write given up on,
+    and ``on_change(pending)`` whenever the number of queued writes changes.
+    """
+
+    def __init__(self, send, path=QUEUE_FILE, retry_on=(OSError,), on_result=None, on_error=None,
+                 on_change=None):
+        self.send = send
+        self.path = path
+        self.retry_on = retry_on
+        self.on_result = on_result
+        self.on_error = on_error
+        self.on_change = on_change
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._failures = 0
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT UNIQUE NOT NULL,
+            url TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            created REAL NOT NULL,
+            state TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            rejections INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT)""")
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(outbox)")}
+        if "rejections" not in columns:
+            # Outbox written by an older version
+            self._db.execute("ALTER TABLE outbox ADD COLUMN rejections INTEGER NOT NULL DEFAULT 0")
+        # Anything caught mid-send by a crash is retried (the key makes that safe)
+        self._db.execute("UPDATE outbox SET state = 'queued' WHERE state = 'sending'")
+
+    def start(self):
+        """Start the background replayer"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+            self._thread.start()
+        self._changed()
+        self.wake()
+
+    def stop(self, timeout=2):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def close(self):
+        self.stop()
+        with self._lock:
+            self._db.close()
+
+    def wake(self):
+        """Retry queued writes now instead of waiting out the backoff"""
+        if self.pending_count():
+            self._wake.set()
+
+    def pending_count(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM outbox").fetchone()[0]
+
+    def pending(self):
+        """The queued writes, oldest first"""
+        with self._lock:
+            rows = self._db.execute("SELECT key, url, payload, created, attempts, rejections, last_error "
+                                    "FROM outbox ORDER BY id").fetchall()
+        return [QueuedWrite(*row) for row in rows]
+
+    def submit(self, url, payload):
+        """Store a write and try to deliver it straight away.
+
+        Returns the server's response, or None if the write was queued to be
+        sent later (the API is unreachable or older writes are still waiting).
+        """
+        key = str(uuid.uuid4())
+        with self._lock:
+            backlog = self._db.execute(
+                "SELECT COUNT(*) FROM outbox WHERE state = 'queued'").fetchone()[0]
+            self._db.execute(
+                "INSERT INTO outbox (key, url, payload, created, state) VALUES (?, ?, ?, ?, ?)",
+                (key, url, json.dumps(payload), time.time(), "queued" if backlog else "sending"))
+        self._changed()
+
+        if backlog:
+            self._nudge()
+            return None
+
+        try:
+            response = self.send(url, payload, key)
+        except self.retry_on as e:
+            self._requeue(key, e)
+            return None
+        except BaseException:
+            # The caller reports this failure, so the write must not be sent again later
+            self._remove(key)
+            raise
+
+        if response.status_code in RETRY_STATUSES:
+            self._requeue(key, f"HTTP {response.status_code}", rejected=True)
+            return None
+        self._remove(key)
+        return response
+
+    def _requeue(self, key, error, rejected=False):
+        with self._lock:
+            self._db.execute("UPDATE outbox SET state = 'queued' WHERE key = ?", (key,))
+        self._record_failure(key, error, rejected)
+        self._nudge()
+
+    def _nudge(self):
+        # An idle replayer has to be woken up; one that is backing off will
+        # come back on its own, and shouldn't be hurried by every new write
+        if self._failures == 0:
+            self._wake.set()
+
+    def _remove(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM outbox WHERE key = ?", (key,))
+        self._changed()
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change(self.pending_count())
+
+    def _oldest_queued(self):
+        with self._lock:
+            row = self._db.execute("SELECT key, url, payload, created, attempts, rejections, last_error "
+                                   "FROM outbox "
+                                   "WHERE state = 'queued' ORDER BY id LIMIT 1").fetchone()
+        return QueuedWrite(*row) if row else None
+
+    def _replay(self):
+        """Send queued writes in order; False if one of them has to wait for a retry"""
+        while not self._stop.is_set():
+            write = self._oldest_queued()
+            if write is None:
+                return True
+
+            try:
+                response = self.send(write.url, write.payload, write.key)
+            except self.retry_on as e:
+                self._record_failure(write.key, e)
+                return False
+            except Exception as e:
+                error = e
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self._remove(write.key)
+                    if self.on_result is not None:
+                        self.on_result(write, response)
+                    continue
+                error = f"HTTP {response.status_code}"
+
+            # Only failures from a reachable API count: an outage must never cost a write
+            if write.rejections + 1 >= MAX_ATTEMPTS:
+                # Drop it so the writes queued behind it can go
+                self._remove(write.key)
+                if self.on_error is not None:
+                    self.on_error(write, error)
+                continue
+            self._record_failure(write.key, error, rejected=True)
+            return False
+        return True
+
+    def _record_failure(self, key, error, rejected=False):
+        with self._lock:
+            self._db.execute("UPDATE outbox SET attempts = attempts + 1, rejections = rejections + ?, "
+                             "last_error = ? WHERE key = ?", (int(rejected), str(error), key))
+
+    def _run(self):
+        delay = None
+        while not self._stop.is_set():
+            self._wake.wait(delay)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+
+            try:
+                delivered = self._replay()
+            except Exception:
+                delivered = False  # never let one bad write kill the replayer
+
+            if delivered:
+                self._failures = 0
+                delay = None
+            else:
+                self._failures += 1
+                backoff = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self._failures - 1))
+                delay = backoff * random.uniform(0.5, 1.0)
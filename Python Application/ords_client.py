@@ -0,0 +1,413 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote
+
+import requests
+import urllib3
+
+import metrics
+from api_cache import ResponseCache
+from history_sync import HistoryStore
+from records import Employee, HistoryEntry, InventoryItem
+from singleflight import SingleFlight
+from snapshot_store import SnapshotStore
+from transport import Transport, CircuitOpenError, endpoint_name
+
+# Suppress SSL warnings for testing only
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+# API configuration (EQUIPFLOW_API_URL points the client at another server, e.g. mock_ords.py)
+API_URL = os.environ.get("EQUIPFLOW_API_URL", "https://oracleapex.com/ords/nexora/api")
+HEADERS = {
+    "Content-Type": "application/json",
+    "User-Agent": "NexoraEquipmentApp/1.0"
+}
+
+# Pooled keep-alive HTTP client with per-endpoint timeouts, GET retries and a circuit breaker
+transport = Transport(HEADERS, verify=False)  # SSL verification disabled for testing
+
+# Read-through cache for GET endpoints
+response_cache = ResponseCache()
+revalidating = set()
+revalidating_lock = threading.Lock()
+
+# Concurrent GETs for the same URL share one request and one parsed result
+inflight = SingleFlight()
+
+# Worker threads for background I/O (prefetch, revalidation, batch requests)
+IO_WORKERS = 4
+
+# Worker threads that fetch the next ORDS page while the current one is processed
+PAGE_WORKERS = 4
+
+# Safety limit on the number of ORDS pages followed for one collection
+MAX_PAGES = 1000
+
+# Endpoints found not to support ORDS "q" filters (filtered on the client instead)
+filter_unsupported = set()
+
+# Background I/O pool shared by prefetching, cache revalidation and batches
+io_pool = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+
+# Next-page prefetches get their own pool: most paging loops already run on
+# io_pool, and a worker waiting on a task queued behind it would never wake up
+page_pool = ThreadPoolExecutor(max_workers=PAGE_WORKERS, thread_name_prefix="page")
+
+# On-disk copies of the last answers, and each employee's local booking history
+snapshots = None
+snapshots_lock = threading.Lock()
+history_stores = {}
+history_stores_lock = threading.Lock()
+
+# Where warnings go (the kiosk points this at its output console)
+log = print
+
+
+class NetworkError(Exception):
+    """The API couldn't be reached (worth retrying later)"""
+
+
+def make_api_request(url, method="GET", payload=None, headers=None):
+    """Helper function to make API requests with better error handling"""
+    try:
+        if method == "GET":
+            return cached_get(url)
+
+        # POST
+        response = transport.post(url, json=payload, headers=headers)
+        if response.status_code == 200:
+            invalidate_after_write(url, payload)
+        return response
+
+    except CircuitOpenError as e:
+        raise NetworkError(str(e))
+    except requests.exceptions.Timeout:
+        raise NetworkError("Request timed out - server may be busy")
+    except requests.exceptions.ConnectionError:
+        raise NetworkError("Connection failed - check network connection")
+    except requests.exceptions.RequestException as e:
+        raise Exception(f"Request error: {e}")
+
+
+def fetch_and_cache(url, entry=None):
+    """GET a URL, revalidating ``entry`` with If-None-Match/If-Modified-Since"""
+    headers = entry.conditional_headers() if entry is not None else None
+    response = transport.get(url, headers=headers)
+    if response.status_code == 304 and entry is not None:
+        response_cache.refresh(url)
+        return entry.response
+    if response.status_code == 200:
+        response_cache.store(url, response)
+    elif response.status_code >= 500 and entry is not None:
+        # Server is degraded - keep showing what we have
+        return entry.response
+    return response
+
+
+def revalidate_in_background(url, entry):
+    """Refresh a stale cache entry without making the caller wait"""
+    with revalidating_lock:
+        if url in revalidating:
+            return
+        revalidating.add(url)
+
+    def revalidate():
+        try:
+            fetch_and_cache(url, entry)
+        except requests.exceptions.RequestException:
+            pass  # keep serving the stale copy until the server is back
+        finally:
+            with revalidating_lock:
+                revalidating.discard(url)
+
+    io_pool.submit(revalidate)
+
+
+def cached_get(url):
+    """GET through the response cache (fresh hit, revalidate, or fetch).
+
+    An expired entry is revalidated before answering (usually a cheap 304).
+    Only while ORDS is failing is it served straight away and revalidated in
+    the background, so a healthy server never gets a stale answer back.
+    """
+    entry = response_cache.get(url)
+    if entry is not None:
+        if entry.is_fresh():
+            return entry.response
+        if transport.breaker(url).degraded and response_cache.is_servable_stale(entry):
+            revalidate_in_background(url, entry)
+            return entry.response
+
+    try:
+        return fetch_and_cache(url, entry)
+    except requests.exceptions.RequestException:
+        if entry is not None:
+            # Network is down - an old answer beats no answer
+            return entry.response
+        raise
+
+
+def invalidate_after_write(url, payload):
+    """Drop cached reads that a successful checkout or return has made stale"""
+    if url.endswith("/checkout") or url.endswith("/return"):
+        response_cache.invalidate(f"{API_URL}/inventory")
+        if payload and payload.get("employee_id") is not None:
+            response_cache.invalidate(f"{API_URL}/history/{payload['employee_id']}")
+
+
+def fetch_json(url):
+    """GET and parse a URL, returning (status code, data).
+
+    Concurrent callers asking for the same URL share one HTTP request and
+    one parsed result, which must not be modified. ``data`` is None unless
+    the status is 200.
+    """
+    def load():
+        response = make_api_request(url)
+        if response.status_code != 200:
+            return response.status_code, None
+        with metrics.span("equipflow_api_parse", endpoint=endpoint_name(url)):
+            return response.status_code, response.json()
+
+    return inflight.do(url, load)
+
+
+class ApiStatusError(Exception):
+    """The API answered with an unexpected HTTP status"""
+
+    def __init__(self, status_code):
+        super().__init__(f"API error: {status_code}")
+        self.status_code = status_code
+
+
+def ords_items(data):
+    """Rows of an ORDS collection response (or the response itself if it's a plain list)"""
+    if isinstance(data, dict) and 'items' in data:
+        return data['items']
+    return data or []
+
+
+def next_page_url(url, data):
+    """URL of the next ORDS page, or None if this was the last one"""
+    if not isinstance(data, dict) or not data.get('hasMore'):
+        return None
+
+    for link in data.get('links', []):
+        if link.get('rel') == 'next' and link.get('href'):
+            return link['href']
+
+    # No "next" link - build one from offset/count like ORDS does
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query['offset'] = int(data.get('offset', 0)) + int(data.get('count', len(data.get('items', []))))
+    if data.get('limit'):
+        query['limit'] = data['limit']
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+def iter_ords_pages(url):
+    """Yield the rows of an ORDS collection one page at a time.
+
+    ORDS splits large collections into pages linked by ``hasMore``/``next``.
+    While the caller is processing one page, the next one is already being
+    fetched on the page pool.
+    """
+    status_code, data = fetch_json(url)
+    if status_code != 200:
+        raise ApiStatusError(status_code)
+
+    seen = {url}
+    for _ in range(MAX_PAGES):
+        next_url = next_page_url(url, data)
+        if next_url in seen:
+            next_url = None  # server sent us in a loop
+        upcoming = page_pool.submit(fetch_json, next_url) if next_url else None
+
+        yield ords_items(data)
+
+        if upcoming is None:
+            return
+        status_code, data = upcoming.result()
+        if status_code != 200:
+            raise ApiStatusError(status_code)
+        url = next_url
+        seen.add(url)
+
+
+def fetch_collection(url):
+    """Fetch every row of an ORDS collection, following its pages"""
+    rows = []
+    for page in iter_ords_pages(url):
+        rows.extend(page)
+    return rows
+
+
+def with_filter(url, q):
+    """Add an ORDS ``q`` filter (a JSON query object) to a collection URL"""
+    return f"{url}?q={quote(json.dumps(q, separators=(',', ':')))}"
+
+
+def iter_filtered_pages(url, q, matches, record_type):
+    """Yield pages of ``record_type`` records matching ``matches``, letting ORDS filter with ``q`` when it can.
+
+    Rows are always re-checked on the client, so an endpoint that ignores or
+    rejects the filter still gives the right answer; it is then remembered
+    in ``filter_unsupported`` and queried without the filter from then on.
+    """
+    if url not in filter_unsupported:
+        try:
+            for page in iter_ords_pages(with_filter(url, q)):
+                records = [record for record in record_type.from_rows(page) if matches(record)]
+                if len(records) != len(page):
+                    filter_unsupported.add(url)  # server ignored the filter
+                yield records
+            return
+        except ApiStatusError as e:
+            if e.status_code not in (400, 404, 501):
+                raise
+            filter_unsupported.add(url)
+
+    for page in iter_ords_pages(url):
+        yield [record for record in record_type.from_rows(page) if matches(record)]
+
+
+def api_error(response):
+    """Extract the error message from a failed API response"""
+    try:
+        error_data = response.json()
+        return error_data.get('error', 'Unknown error')
+    except json.JSONDecodeError:
+        return response.text
+
+
+def get_snapshots():
+    """Return the on-disk snapshot store, opening it on first use"""
+    global snapshots
+    with snapshots_lock:
+        if snapshots is None:
+            snapshots = SnapshotStore()
+        return snapshots
+
+
+def close_snapshots():
+    """Close the snapshot store if it was opened"""
+    global snapshots
+    with snapshots_lock:
+        if snapshots is not None:
+            snapshots.close()
+            snapshots = None
+
+
+def save_snapshot(key, records):
+    """Keep records on disk for the next start-up or login (best effort)"""
+    try:
+        get_snapshots().save(key, records)
+    except (OSError, sqlite3.Error) as e:
+        log(f"⚠️ Could not save offline copy of {key}: {e}")
+
+
+def load_snapshot(key, record_type):
+    """Return (records, saved_at) from disk, or None"""
+    try:
+        return get_snapshots().load(key, record_type)
+    except (OSError, sqlite3.Error, ValueError):
+        return None
+
+
+def get_history_store(emp_id):
+    """Return the local history of ``emp_id``, starting from the disk snapshot if there is one"""
+    with history_stores_lock:
+        store = history_stores.get(emp_id)
+        if store is None:
+            snapshot = load_snapshot(f"history/{emp_id}", HistoryEntry)
+            if snapshot is not None:
+                store = HistoryStore(snapshot[0])
+                store.synced_at = snapshot[1]
+            else:
+                store = HistoryStore()
+            history_stores[emp_id] = store
+        return store
+
+
+def update_history(store, emp_id, on_page=None, cancelled=None):
+    """Bring ``store`` up to date with the bookings of ``emp_id``; False if ``cancelled()`` stopped it.
+
+    The first sync downloads everything, passing each page to ``on_page``.
+    Later ones only ask ORDS for bookings newer than the last one seen and
+    for the ones still open, so the transfer grows with new activity rather
+    than with the employee's whole history.
+    """
+    with store.lock:
+        url = f"{API_URL}/history/{emp_id}"
+        query = store.delta_query()
+        if query is None:
+            pages = (HistoryEntry.from_rows(page) for page in iter_ords_pages(url))
+        else:
+            pages = iter_filtered_pages(url, query, store.is_delta, HistoryEntry)
+
+        for entries in pages:
+            if cancelled is not None and cancelled():
+                return False  # the cursor isn't moved, so the next sync catches up
+            store.merge(entries)
+            if on_page is not None:
+                on_page(entries)
+
+        store.commit(time.time())
+    return True
+
+
+def sync_history(emp_id, on_page=None, cancelled=None):
+    """Bring the local history of ``emp_id`` up to date, save it to disk and return its HistoryStore"""
+    store = get_history_store(emp_id)
+    if update_history(store, emp_id, on_page, cancelled):
+        with store.lock:
+            entries = store.entries()
+        save_snapshot(f"history/{emp_id}", entries)
+    return store
+
+
+def fetch_employee(emp_id):
+    """The employee with ID ``emp_id``, or None if the API doesn't know them"""
+    status_code, data = fetch_json(f"{API_URL}/employee/{emp_id}")
+    if status_code == 404:
+        return None
+    if status_code != 200:
+        raise ApiStatusError(status_code)
+    if isinstance(data, dict) and 'items' in data:
+        return Employee.from_row(data['items'][0]) if data['items'] else None
+    return Employee.from_row(data) if data else None
+
+
+def fetch_available_inventory():
+    """Every inventory item that is available for checkout"""
+    available_items = []
+    query = {"status": "Available"}
+    for items in iter_filtered_pages(f"{API_URL}/inventory", query, lambda item: item.is_available, InventoryItem):
+        available_items.extend(items)
+    return available_items
+
+
+def checkout_payload(emp_id, checkout_data, qr_code):
+    """Body of a checkout request"""
+    return {
+        "item_id": checkout_data["item_id"],
+        "employee_id": int(emp_id),
+        "qr_code": qr_code,
+        "is_damaged": checkout_data["is_damaged"],
+        "checkout_notes": checkout_data["notes"]
+    }
+
+
+def return_payload(emp_id, return_data, qr_code):
+    """Body of a return request"""
+    return {
+        "booking_id": int(return_data["booking_id"]),
+        "employee_id": int(emp_id),
+        "qr_code": qr_code,
+        "return_notes": return_data["notes"],
+        "is_damaged": return_data["is_damaged"]
+    }
@@ -1,46 +1,828 @@
-import cv2
-
-def scan_employee_qr():
-    """Open webcam and scan a single QR code, then return its data."""
-    # Use CAP_DSHOW for Windows (most stable)
-    cap = cv2.VideoCapture(0, cv2.CAP_DSHOW)
-    if not cap.isOpened():
-        print("❌ Cannot access webcam")
-        return None
+import argparse
+import atexit
+import glob
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
 
-    detector = cv2.QRCodeDetector()
-    emp_id = None
+import metrics
 
-    print("📷 Hold your Employee QR code in front of the camera... (press 'q' to cancel)")
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            continue
+class _LazyModule:
+    """Stand-in that imports the real module on first attribute access.
+
+    OpenCV and NumPy take a large share of the application's start-up time,
+    so they are only loaded once a scan (or camera warm-up) actually needs
+    them.
+    """
+
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attribute):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attribute)
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+
+cv2 = _LazyModule("cv2")
+np = _LazyModule("numpy")
+
+# How often the capture thread updates the equipflow_camera_fps gauge (seconds)
+FPS_WINDOW = 5.0
+
+# Number of recent frames kept by the warm camera service
+RING_SIZE = 4
+
+# Decode threads (OpenCV releases the GIL while decoding)
+DECODE_WORKERS = 2
+
+# Maximum refresh rate of the preview (OpenCV window or published frames)
+PREVIEW_FPS = 10
+
+# Width of the downscaled preview frames published in headless mode
+PREVIEW_WIDTH = 320
+
+# Sleep between retries when the camera returns no frame
+READ_RETRY_DELAY = 0.01
+
+# Adaptive detection: scales tried (smallest first) when searching a full frame
+DETECT_SCALES = (0.5, 1.0)
+
+# Padding around the last located code, as a fraction of its size
+ROI_PADDING = 0.25
+
+# Smallest region (in pixels) decoded around a tracked code
+ROI_MIN_SIZE = 96
+
+# Misses inside the tracked region before going back to a full-frame search
+ROI_MAX_MISSES = 5
+
+# Seconds a batch scan keeps collecting codes after the first one is seen
+BATCH_WINDOW = 3.0
+
+# Where the calibration command records the best decoder for this machine
+CALIBRATION_FILE = os.environ.get(
+    "EQUIPFLOW_SCANNER_CONFIG",
+    os.path.join(os.path.expanduser("~"), ".equipflow", "scanner.json"))
+
+# Images used by the calibration command
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "QR Code - Employees")
+
+# A backend is "reliable" if its decode rate is within this margin of the best one
+RELIABILITY_MARGIN = 0.05
+
+
+def _open_camera(device):
+    """Open the webcam with the most stable backend for this platform"""
+    if sys.platform == "win32":
+        # Use CAP_DSHOW for Windows (most stable)
+        cap = cv2.VideoCapture(device, cv2.CAP_DSHOW)
+    else:
+        cap = cv2.VideoCapture(device)
+    # Keep the driver from queueing stale frames behind the newest one
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
+
+
+class DecoderBackend:
+    """Interface for the QR decoders the scanner can use.
+
+    Both methods take a grayscale or BGR image and report points in that
+    image's coordinates as a float array of shape (1, N, 2).
+    """
+
+    name = None
+
+    @classmethod
+    def available(cls):
+        return True
+
+    def detect_and_decode(self, image):
+        """Return (data, points) for one code; ("", None) if nothing was found"""
+        raise NotImplementedError
+
+    def detect_and_decode_multi(self, image):
+        """Return a list of (data, points) for every code found"""
+        raise NotImplementedError
+
+
+class OpenCVBackend(DecoderBackend):
+    """The classic cv2.QRCodeDetector"""
+
+    name = "opencv"
+
+    def __init__(self):
+        self._detector = self._create()
+
+    def _create(self):
+        return cv2.QRCodeDetector()
+
+    def detect_and_decode(self, image):
+        data, points, _ = self._detector.detectAndDecode(image)
+        if points is None:
+            return "", None
+        return data, points.astype(np.float32)
+
+    def detect_and_decode_multi(self, image):
+        found, decoded, points, _ = self._detector.detectAndDecodeMulti(image)
+        if not found:
+            return []
+        return [(data, pts[None].astype(np.float32)) for data, pts in zip(decoded, points)]
+
+
+class ArucoBackend(OpenCVBackend):
+    """cv2.QRCodeDetectorAruco - more robust finder-pattern search (OpenCV 4.8+)"""
+
+    name = "aruco"
+
+    @classmethod
+    def available(cls):
+        return hasattr(cv2, "QRCodeDetectorAruco")
+
+    def _create(self):
+        return cv2.QRCodeDetectorAruco()
+
+
+class ZbarBackend(DecoderBackend):
+    """ZBar through the optional pyzbar package"""
+
+    name = "zbar"
+
+    @classmethod
+    def available(cls):
+        try:
+            from pyzbar import pyzbar  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def __init__(self):
+        from pyzbar import pyzbar
+        self._pyzbar = pyzbar
+
+    def detect_and_decode_multi(self, image):
+        if image.ndim == 3:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        results = []
+        for symbol in self._pyzbar.decode(image, symbols=[self._pyzbar.ZBarSymbol.QRCODE]):
+            points = np.array([[(p.x, p.y) for p in symbol.polygon]], dtype=np.float32)
+            results.append((symbol.data.decode("utf-8", errors="replace"), points))
+        return results
+
+    def detect_and_decode(self, image):
+        results = self.detect_and_decode_multi(image)
+        if not results:
+            return "", None
+        return results[0]
+
+
+BACKENDS = {backend.name: backend for backend in (OpenCVBackend, ArucoBackend, ZbarBackend)}
+
+
+def available_backends():
+    """Names of the decoder backends that can run on this machine"""
+    return [name for name, backend in BACKENDS.items() if backend.available()]
+
+
+def default_backend():
+    """The backend recorded by the last calibration, or the classic OpenCV detector"""
+    try:
+        with open(CALIBRATION_FILE) as f:
+            name = json.load(f).get("backend")
+    except (OSError, ValueError):
+        return OpenCVBackend.name
+
+    if name in BACKENDS and BACKENDS[name].available():
+        return name
+    return OpenCVBackend.name
+
+
+def create_backend(name=None):
+    """Create a decoder backend by name (defaults to ``default_backend()``)"""
+    name = name or default_backend()
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown QR decoder backend: {name}")
+    if not BACKENDS[name].available():
+        raise ValueError(f"QR decoder backend '{name}' is not available on this machine")
+    return BACKENDS[name]()
+
+
+class RoiTracker:
+    """Remembers where the last QR code was seen, shared by all decode workers"""
+
+    def __init__(self, padding=ROI_PADDING, max_misses=ROI_MAX_MISSES):
+        self.padding = padding
+        self.max_misses = max_misses
+        self._region = None
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def region(self):
+        """Return the (x0, y0, x1, y1) region to search, or None for a full-frame search"""
+        with self._lock:
+            return self._region
+
+    def hit(self, points, shape):
+        """Track the code found at ``points`` (full-frame coordinates); returns its search region"""
+        pts = points.reshape(-1, 2)
+        x0, y0 = pts.min(axis=0)
+        x1, y1 = pts.max(axis=0)
+        pad = max(x1 - x0, y1 - y0) * self.padding
+        pad = max(pad, (ROI_MIN_SIZE - min(x1 - x0, y1 - y0)) / 2)
+
+        height, width = shape[:2]
+        region = (max(int(x0 - pad), 0), max(int(y0 - pad), 0),
+                  min(int(x1 + pad) + 1, width), min(int(y1 + pad) + 1, height))
+        with self._lock:
+            self._region = region
+            self._misses = 0
+        return region
+
+    def miss(self):
+        with self._lock:
+            self._misses += 1
+            if self._misses >= self.max_misses:
+                self._region = None
+                self._misses = 0
+
+    def reset(self):
+        with self._lock:
+            self._region = None
+            self._misses = 0
+
+
+class AdaptiveDetector:
+    """QR detection that avoids searching every full-resolution frame.
+
+    A full-frame search runs on a downscaled grayscale image first and only
+    moves up to full resolution if nothing was found. Once a code has been
+    located, later frames are decoded only inside a padded region around it
+    until ``ROI_MAX_MISSES`` consecutive misses send it back to a full search.
+    """
+
+    def __init__(self, tracker, backend=None, scales=DETECT_SCALES):
+        self.tracker = tracker
+        self.scales = scales
+        self._backend = create_backend(backend)
+
+    def _detect(self, image, x0=0, y0=0):
+        data, points = self._backend.detect_and_decode(image)
+        if points is None:
+            return "", None
+        return data, points + (x0, y0)
+
+    def _decode_region(self, gray, region):
+        x0, y0, x1, y1 = region
+        return self._detect(gray[y0:y1, x0:x1], x0, y0)
+
+    def detect_and_decode(self, frame):
+        """Return (data, points) like cv2.QRCodeDetector, in full-frame coordinates"""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        region = self.tracker.region()
+        if region is not None:
+            data, points = self._decode_region(gray, region)
+            if points is None:
+                self.tracker.miss()
+            else:
+                self.tracker.hit(points, gray.shape)
+            return data, points
+
+        for scale in self.scales:
+            if scale == 1.0:
+                image = gray
+            else:
+                image = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+            data, points = self._detect(image)
+            if points is None:
+                continue
+
+            points = points / scale
+            # Use the region computed here: another worker may already have moved or reset the tracker
+            region = self.tracker.hit(points, gray.shape)
+            if not data and scale != 1.0:
+                # Located at low resolution but too small to decode - retry the
+                # region at full resolution instead of the whole frame
+                data, roi_points = self._decode_region(gray, region)
+                if roi_points is not None:
+                    points = roi_points
+            return data, points
+
+        return "", None
+
+    def detect_and_decode_multi(self, frame):
+        """Return a list of (data, points) for every code in the frame"""
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        # Several codes can be anywhere in the frame, so skip ROI tracking
+        for scale in self.scales:
+            if scale == 1.0:
+                image = gray
+            else:
+                image = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+            results = self._backend.detect_and_decode_multi(image)
+            if not results:
+                continue
+            # Move up to full resolution if some located codes didn't decode
+            if scale != 1.0 and not all(data for data, _ in results):
+                continue
+            return [(data, points / scale) for data, points in results]
+
+        return []
+
+
+class ScanRequest:
+    """A pending request for the next decoded QR code.
+
+    Decode workers only run while at least one request is open, so an idle
+    scanner costs nothing but frame capture. A ``cancel`` counts from the
+    moment the request is created, so create it before starting the camera
+    and a cancel that arrives while the camera is opening isn't lost.
+    """
+
+    def __init__(self, scanner, multi=False):
+        self._scanner = scanner
+        self._multi = multi
+        self._since = None
+        self._found = {}  # distinct codes in the order they were first decoded
+        self._generation = scanner._generation
+
+    def __enter__(self):
+        self._scanner._add_waiter(self)
+        return self
+
+    def __exit__(self, *exc):
+        self._scanner._remove_waiter(self)
 
-        data, points, _ = detector.detectAndDecode(frame)
+    def poll(self):
+        """Return a code decoded since the request was opened, or None"""
+        return self._scanner._code_since(self._since)
 
+    def wait(self, timeout=None):
+        """Block until a code is decoded (returns None on timeout)"""
+        return self._scanner._wait_for_code(self._since, self._generation, timeout)
+
+    def codes(self):
+        """Return every distinct code decoded since the request was opened, in order"""
+        return self._scanner._codes_of(self)
+
+    def cancelled(self):
+        """True once ``QRScanner.cancel`` was called after the request was created"""
+        return self._scanner._generation != self._generation
+
+    def sleep(self, seconds):
+        """Keep collecting for ``seconds``; returns False if the scan was cancelled"""
+        return self._scanner._wait_cancelled(self._generation, seconds)
+
+
+class QRScanner:
+    """Long-lived webcam service that keeps the camera open between scans.
+
+    The work is split into a pipeline so a slow decode never stalls capture:
+
+    * one capture thread reads frames into a small ring buffer and always
+      publishes the newest one,
+    * a pool of decode workers each take the newest frame nobody has claimed
+      yet - older frames are dropped, so decode latency is bounded by one
+      frame period rather than by queue depth,
+    * with ``adaptive`` enabled, workers use ``AdaptiveDetector`` and share
+      one ``RoiTracker`` so a code found by one worker narrows the search
+      for all of them,
+    * rendering is left to the caller (see ``scan_employee_qr``), which reads
+      ``latest_frame`` and ``last_points`` at its own rate.
+
+    Frames are read into a ring of preallocated buffers, so steady-state
+    capture allocates nothing. A buffer a worker is decoding is skipped
+    until the worker hands it back, so a slow decode never sees its frame
+    overwritten. The service itself never touches highgui; a
+    GUI can register ``set_preview_callback`` to receive throttled,
+    downscaled RGB frames instead.
+    """
+
+    def __init__(self, device=0, ring_size=RING_SIZE, workers=DECODE_WORKERS, adaptive=True, backend=None):
+        self.device = device
+        self.workers = workers
+        self.adaptive = adaptive
+        self.backend = backend or default_backend()
+        self.last_points = None
+        self.decode_errors = 0
+        # Buffers are reused; the ones workers are decoding (by id) are skipped
+        # until handed back, so there must be more buffers than workers
+        self._frames = deque(maxlen=max(ring_size, workers + 2))
+        self._held = set()
+        self._seq = 0
+        self._claimed_seq = 0
+        self._waiters = 0
+        self._multi_waiters = 0
+        self._generation = 0
+        self._preview_callback = None
+        self._preview_interval = 1.0 / PREVIEW_FPS
+        self._preview_width = PREVIEW_WIDTH
+        self._last_preview = 0.0
+        self._code = None  # (seq, data) of the most recent successful decode
+        self._requests = []  # open ScanRequests, which collect the distinct codes they see
+        self._tracker = RoiTracker()
+        self._cond = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._cap = None
+        self._opened_at = None
+        self._threads = []
+        self._running = False
+
+    @property
+    def running(self):
+        return self._running
+
+    def start(self):
+        """Open the camera and start the pipeline threads (no-op if already running)"""
+        with self._start_lock:
+            if self._running:
+                return True
+
+            started = time.perf_counter()
+            cap = _open_camera(self.device)
+            if not cap.isOpened():
+                print("❌ Cannot access webcam")
+                metrics.inc("equipflow_camera_open_failures_total")
+                cap.release()
+                return False
+            metrics.observe("equipflow_camera_open_seconds", time.perf_counter() - started)
+
+            self._cap = cap
+            self._opened_at = started
+            self._running = True
+            self._threads = [threading.Thread(target=self._capture_loop, name="qr-capture", daemon=True)]
+            for i in range(self.workers):
+                self._threads.append(
+                    threading.Thread(target=self._decode_loop, name=f"qr-decode-{i}", daemon=True))
+            for thread in self._threads:
+                thread.start()
+            return True
+
+    def stop(self):
+        """Stop the pipeline threads and release the camera"""
+        with self._start_lock:
+            if not self._running:
+                return
+            with self._cond:
+                self._running = False
+                self._cond.notify_all()
+            threads = self._threads
+            self._threads = []
+
+        for thread in threads:
+            thread.join(timeout=2)
+        if self._cap is not None:
+            self._cap.release()
+            self._cap = None
+
+        with self._cond:
+            self._frames.clear()
+            self._claimed_seq = self._seq
+            self._code = None
+            self._cond.notify_all()
+
+    def _capture_loop(self):
+        ring = None
+        index = 0
+        window_started, window_frames = time.perf_counter(), 0
+        while self._running:
+            if ring is None:
+                ret, frame = self._cap.read()
+            else:
+                ret, frame = self._cap.read(ring[index])
+            if not ret:
+                # Don't spin on a camera that is not delivering frames
+                time.sleep(READ_RETRY_DELAY)
+                continue
+
+            if metrics.enabled:
+                now = time.perf_counter()
+                if ring is None:
+                    metrics.observe("equipflow_camera_first_frame_seconds", now - self._opened_at)
+                window_frames += 1
+                if now - window_started >= FPS_WINDOW:
+                    metrics.set_gauge("equipflow_camera_fps", round(window_frames / (now - window_started), 1))
+                    window_started, window_frames = now, 0
+
+            new_ring = ring is None or frame is not ring[index]
+            if new_ring:
+                # First frame, or the camera changed resolution
+                ring = [np.empty_like(frame) for _ in range(self._frames.maxlen)]
+
+            with self._cond:
+                self._seq += 1
+                self._frames.append((self._seq, frame))
+                self._cond.notify_all()
+                # Next buffer to read into: never one a worker is still decoding
+                index = 0 if new_ring else (index + 1) % len(ring)
+                while id(ring[index]) in self._held:
+                    index = (index + 1) % len(ring)
+
+            if self._preview_callback is not None:
+                self._publish_preview(frame)
+
+    def _publish_preview(self, frame):
+        now = time.monotonic()
+        if now - self._last_preview < self._preview_interval:
+            return
+        self._last_preview = now
+
+        callback = self._preview_callback
+        if callback is None:
+            return
+
+        height, width = frame.shape[:2]
+        scale = self._preview_width / width
+        small = cv2.resize(frame, (self._preview_width, int(height * scale)), interpolation=cv2.INTER_AREA)
+        points = self.last_points
         if points is not None:
-            points = points[0].astype(int)
-            for i in range(len(points)):
-                pt1 = tuple(points[i])
-                pt2 = tuple(points[(i + 1) % len(points)])
-                cv2.line(frame, pt1, pt2, (0, 255, 0), 2)
+            _draw_points(small, points * scale)
+        callback(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+
+    def set_preview_callback(self, callback, fps=PREVIEW_FPS, width=PREVIEW_WIDTH):
+        """Publish downscaled RGB preview frames to ``callback`` (None to stop).
+
+        The callback runs on the capture thread, so it should only hand the
+        frame over to the GUI thread.
+        """
+        self._preview_interval = 1.0 / fps
+        self._preview_width = width
+        self._preview_callback = callback
+
+    def _claim_frame(self):
+        """Wait for an unclaimed frame while someone is waiting for a code"""
+        with self._cond:
+            while self._running and (self._waiters == 0 or self._seq <= self._claimed_seq
+                                     or not self._frames):
+                self._cond.wait()
+            if not self._running:
+                return None
+            # Always jump to the newest frame; anything older is dropped
+            self._claimed_seq = self._seq
+            seq, frame = self._frames[-1]
+            self._held.add(id(frame))
+            return seq, frame, self._multi_waiters > 0
+
+    def _release_frame(self, frame):
+        """Let the capture thread reuse a buffer claimed by ``_claim_frame``"""
+        with self._cond:
+            self._held.discard(id(frame))
+
+    def _decode_loop(self):
+        # Detectors are not thread-safe, so every worker owns one
+        if self.adaptive:
+            detector = AdaptiveDetector(self._tracker, self.backend)
+        else:
+            detector = create_backend(self.backend)
+
+        while True:
+            entry = self._claim_frame()
+            if entry is None:
+                return
+            seq, frame, multi = entry
+
+            started = time.perf_counter() if metrics.enabled else None
+            try:
+                if multi:
+                    results = detector.detect_and_decode_multi(frame)
+                else:
+                    results = [detector.detect_and_decode(frame)]
+            except Exception as e:
+                # One bad frame (e.g. a cv2.error) must not stop this worker for good
+                self.decode_errors += 1
+                metrics.inc("equipflow_scan_decode_errors_total", backend=self.backend)
+                if self.decode_errors == 1:
+                    print(f"⚠️ Could not decode a frame ({e}); skipping frames that fail")
+                continue
+            finally:
+                self._release_frame(frame)
+            if started is not None:
+                # The histogram's count is the number of frames decoded
+                metrics.observe("equipflow_scan_decode_seconds", time.perf_counter() - started,
+                                backend=self.backend, found="true" if any(data for data, _ in results) else "false")
+
+            polygons = [points for _, points in results if points is not None]
+            self.last_points = np.concatenate(polygons) if polygons else None
+
+            decoded = [data.strip() for data, _ in results if data]
+            if decoded:
+                with self._cond:
+                    # Each request keeps its own distinct codes, however often a code repeats
+                    for request in self._requests:
+                        if seq > request._since:
+                            for data in decoded:
+                                request._found.setdefault(data)
+                    if self._code is None or seq > self._code[0]:
+                        self._code = (seq, decoded[0])
+                    self._cond.notify_all()
+
+    def _add_waiter(self, request):
+        with self._cond:
+            if self._waiters == 0:
+                # A new scan may show a code somewhere else entirely
+                self._tracker.reset()
+            self._waiters += 1
+            if request._multi:
+                self._multi_waiters += 1
+            request._since = self._seq
+            self._requests.append(request)
+            self._cond.notify_all()
+
+    def _remove_waiter(self, request):
+        with self._cond:
+            self._waiters -= 1
+            if request._multi:
+                self._multi_waiters -= 1
+            self._requests.remove(request)
+
+    def _codes_of(self, request):
+        with self._cond:
+            return list(request._found)
+
+    def _wait_cancelled(self, generation, timeout):
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._running and self._generation == generation:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self._cond.wait(remaining)
+            return False
+
+    def _code_since(self, since):
+        with self._cond:
+            if self._code is not None and self._code[0] > since:
+                return self._code[1]
+            return None
+
+    def _wait_for_code(self, since, generation, timeout):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._running and self._generation == generation:
+                if self._code is not None and self._code[0] > since:
+                    return self._code[1]
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return None
+
+    def latest_frame(self):
+        """Return the most recent frame, or None if nothing was captured yet"""
+        with self._cond:
+            if not self._frames:
+                return None
+            return self._frames[-1][1]
+
+    def cancel(self):
+        """Make every open ScanRequest stop waiting and return None"""
+        with self._cond:
+            self._generation += 1
+            self._cond.notify_all()
+
+    def request(self, multi=False):
+        """Open a ScanRequest; use it as a context manager.
+
+        With ``multi`` the workers decode every code in each frame
+        (``detectAndDecodeMulti``) instead of just one.
+        """
+        return ScanRequest(self, multi)
+
+    def next_code(self, timeout=None):
+        """Return the first QR code decoded from frames captured after this call.
+
+        Returns None if nothing was decoded within ``timeout`` seconds.
+        """
+        request = self.request()
+        if not self.start():
+            return None
+
+        with request as req:
+            return req.wait(timeout)
 
-        cv2.imshow("QR Scanner", frame)
+    def collect_codes(self, window=BATCH_WINDOW, timeout=None):
+        """Collect every distinct QR code seen within ``window`` seconds of the first one.
 
-        if data:
-            emp_id = data.strip()
+        Returns the codes in the order they were first seen, or an empty list
+        if nothing was decoded within ``timeout`` seconds or the scan was
+        cancelled.
+        """
+        request = self.request(multi=True)
+        if not self.start():
+            return []
+
+        with request as req:
+            if req.wait(timeout) is None:
+                return []
+            if not req.sleep(window):
+                return []
+            return req.codes()
+
+
+_scanner = None
+_scanner_lock = threading.Lock()
+
+
+def get_scanner():
+    """Return the shared scanner service, creating it on first use"""
+    global _scanner
+    with _scanner_lock:
+        if _scanner is None:
+            _scanner = QRScanner()
+            atexit.register(_scanner.stop)
+        return _scanner
+
+
+def shutdown_scanner():
+    """Release the shared camera (call when the application exits)"""
+    with _scanner_lock:
+        if _scanner is not None:
+            _scanner.stop()
+
+
+def _draw_points(frame, points):
+    if points is None:
+        return
+    for polygon in points.astype(int):
+        for i in range(len(polygon)):
+            pt1 = tuple(polygon[i])
+            pt2 = tuple(polygon[(i + 1) % len(polygon)])
+            cv2.line(frame, pt1, pt2, (0, 255, 0), 2)
+
+
+def scan_employee_qr(timeout=None, headless=False):
+    """Scan a single QR code with the warm camera service and return its data.
+
+    In headless mode no OpenCV window is opened; the caller can show the
+    frames published through ``QRScanner.set_preview_callback`` instead and
+    stop the scan with ``QRScanner.cancel``.
+    """
+    with metrics.span("equipflow_scan", mode="headless" if headless else "window") as span:
+        emp_id = _scan_employee_qr(timeout, headless)
+        span.set(outcome="decoded" if emp_id else "none")
+    return emp_id
+
+
+def _scan_employee_qr(timeout, headless):
+    scanner = get_scanner()
+    # Opened before the camera, so a cancel while it is starting still ends this scan
+    request = scanner.request()
+    if not scanner.start():
+        return None
+
+    if headless:
+        with request as req:
+            emp_id = req.wait(timeout)
+        if emp_id:
             print(f"✅ QR Code detected: {emp_id}")
-            cv2.waitKey(500)  # brief pause so the user sees success
-            break
+        return emp_id
+
+    emp_id = None
+    deadline = None if timeout is None else time.monotonic() + timeout
+
+    print("📷 Hold your Employee QR code in front of the camera... (press 'q' to cancel)")
+
+    with request as req:
+        while True:
+            # Render stage: runs at PREVIEW_FPS, independent of the decode workers
+            data = req.wait(timeout=1.0 / PREVIEW_FPS)
+
+            frame = scanner.latest_frame()
+            if frame is not None:
+                frame = frame.copy()
+                _draw_points(frame, scanner.last_points)
+                cv2.imshow("QR Scanner", frame)
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            print("👋 Scan cancelled")
-            break
+            if data:
+                emp_id = data
+                print(f"✅ QR Code detected: {emp_id}")
+                cv2.waitKey(500)  # brief pause so the user sees success
+                break
 
-    cap.release()
-    cv2.destroyAllWindows()
+            if cv2.waitKey(1) & 0xFF == ord('q') or req.cancelled():
+                print("👋 Scan cancelled")
+                break
+
+            if deadline is not None and time.monotonic() > deadline:
+                print("⌛ Scan timed out")
+                break
+
+    # Only close the preview window - the camera stays open for the next scan
+    cv2.destroyWindow("QR Scanner")
 
     # Important: flush OpenCV events once
     for _ in range(3):
@@ -49,7 +831,122 @@ def scan_employee_qr():
     return emp_id
 
 
+def _synthetic_variants(image):
+    """Yield (name, gray frame) variants that mimic hard kiosk conditions"""
+    gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+    # Place the code on a camera-sized frame so detection has to search for it
+    frame = np.full((480, 640), 255, dtype=np.uint8)
+    height, width = gray.shape
+    scale = min(300 / height, 300 / width)
+    code = cv2.resize(gray, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA)
+    y0 = (480 - code.shape[0]) // 2
+    x0 = (640 - code.shape[1]) // 2
+    frame[y0:y0 + code.shape[0], x0:x0 + code.shape[1]] = code
+
+    yield "clean", frame
+    yield "blur", cv2.GaussianBlur(frame, (7, 7), 0)
+    yield "motion-blur", cv2.filter2D(frame, -1, np.full((1, 9), 1 / 9.0))
+    for angle in (15, 30, 45):
+        matrix = cv2.getRotationMatrix2D((320, 240), angle, 1.0)
+        yield f"rotate-{angle}", cv2.warpAffine(frame, matrix, (640, 480), borderValue=255)
+    rng = np.random.default_rng(0)
+    dark = frame.astype(np.float32) * 0.3 + rng.normal(0, 6, frame.shape)
+    yield "low-light", np.clip(dark, 0, 255).astype(np.uint8)
+
+
+def load_corpus(paths=None):
+    """Load calibration samples as (label, expected data, gray frame)"""
+    files = []
+    for path in paths or [DEFAULT_CORPUS]:
+        if os.path.isdir(path):
+            for pattern in ("*.jpg", "*.jpeg", "*.png"):
+                files.extend(glob.glob(os.path.join(path, pattern)))
+        else:
+            files.append(path)
+
+    reference = [create_backend(name) for name in available_backends()]
+    samples = []
+    for path in sorted(files):
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        # The expected payload is whatever any backend reads from the clean image
+        expected = next((data for data in (b.detect_and_decode(image)[0] for b in reference) if data), None)
+        if not expected:
+            print(f"⚠️ Skipping {os.path.basename(path)}: no backend can decode it")
+            continue
+        for variant, frame in _synthetic_variants(image):
+            samples.append((f"{os.path.basename(path)}:{variant}", expected.strip(), frame))
+    return samples
+
+
+def calibrate(corpus=None, backends=None, save=True):
+    """Benchmark every decoder backend on the corpus and record the best one"""
+    samples = load_corpus(corpus)
+    if not samples:
+        print("❌ No calibration images found")
+        return None
+
+    results = {}
+    for name in backends or available_backends():
+        backend = create_backend(name)
+        backend.detect_and_decode(samples[0][2])  # warm up
+
+        decoded = 0
+        elapsed = 0.0
+        for _, expected, frame in samples:
+            start = time.perf_counter()
+            data, _ = backend.detect_and_decode(frame)
+            elapsed += time.perf_counter() - start
+            if data and data.strip() == expected:
+                decoded += 1
+
+        results[name] = {
+            "decode_rate": decoded / len(samples),
+            "ms_per_frame": elapsed * 1000 / len(samples),
+        }
+
+    print(f"📊 Decoder calibration over {len(samples)} frames:")
+    for name, result in results.items():
+        print(f"   {name:8} decode rate {result['decode_rate']:6.1%}   {result['ms_per_frame']:7.2f} ms/frame")
+
+    best_rate = max(result["decode_rate"] for result in results.values())
+    reliable = [name for name, result in results.items()
+                if result["decode_rate"] >= best_rate - RELIABILITY_MARGIN]
+    best = min(reliable, key=lambda name: results[name]["ms_per_frame"])
+    print(f"✅ Fastest reliable backend: {best}")
+
+    if save:
+        os.makedirs(os.path.dirname(CALIBRATION_FILE), exist_ok=True)
+        with open(CALIBRATION_FILE, "w") as f:
+            json.dump({
+                "backend": best,
+                "calibrated_at": datetime.now().isoformat(timespec="seconds"),
+                "frames": len(samples),
+                "results": results,
+            }, f, indent=2)
+        print(f"💾 Saved to {CALIBRATION_FILE}")
+
+    return best
+
+
 # If you run this file directly, test scanner
 if __name__ == "__main__":
-    emp_id = scan_employee_qr()
-    print("Returned employee ID:", emp_id)
+    parser = argparse.ArgumentParser(description="Nexora QR scanner")
+    parser.add_argument("--calibrate", action="store_true",
+                        help="benchmark the decoder backends and record the best one for this machine")
+    parser.add_argument("--corpus", action="append",
+                        help="image file or directory to calibrate with (repeatable)")
+    parser.add_argument("--backend", choices=sorted(BACKENDS),
+                        help="decoder backend to use (default: the calibrated one)")
+    args = parser.parse_args()
+
+    if args.calibrate:
+        calibrate(args.corpus, [args.backend] if args.backend else None)
+    else:
+        if args.backend:
+            get_scanner().backend = args.backend
+        emp_id = scan_employee_qr()
+        print("Returned employee ID:", emp_id)
+        shutdown_scanner()
@@ -0,0 +1,83 @@
+def _key_variants(field):
+    """The key spellings ORDS responses have been seen to use for a field"""
+    camel = "".join(part.capitalize() for part in field.split("_"))
+    return (field.upper(), field, camel)
+
+
+class Record:
+    """Compact record built from an ORDS row.
+
+    ORDS may return ``ITEM_NAME``, ``item_name`` or ``ItemName`` depending on
+    how the handler was written. Instead of probing every spelling for every
+    field of every row, ``from_rows`` works out the casing of a response
+    once, builds a key mapping, and reuses it for the rest of the rows.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *values):
+        for slot, value in zip(self.__slots__, values):
+            setattr(self, slot, value)
+
+    @classmethod
+    def key_map(cls, rows):
+        """Return the key each field uses in ``rows``.
+
+        ORDS leaves null columns out of a row, so the first row may not
+        mention every field. The casing is taken from the fields a row does
+        have and applied to all of them.
+        """
+        for row in rows:
+            found = [index for field in cls.__slots__
+                     for index, key in enumerate(_key_variants(field)) if key in row]
+            if found:
+                casing = max(set(found), key=found.count)
+                return tuple(_key_variants(field)[casing] for field in cls.__slots__)
+        return tuple(field for field in cls.__slots__)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Convert a list of rows that share one key casing"""
+        if not rows:
+            return []
+        keys = cls.key_map(rows)
+        return [cls(*[row.get(key) for key in keys]) for row in rows]
+
+    @classmethod
+    def from_row(cls, row):
+        return cls.from_rows([row])[0]
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        fields = ", ".join(f"{slot}={getattr(self, slot)!r}" for slot in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class HistoryEntry(Record):
+    """One booking from /history/{emp_id}"""
+
+    __slots__ = ("booking_id", "item_id", "item_name", "category", "date_booked",
+                 "date_returned", "status", "return_notes")
+
+    @property
+    def is_open(self):
+        """True if the item hasn't been returned yet"""
+        return not self.date_returned
+
+
+class InventoryItem(Record):
+    """One item from /inventory"""
+
+    __slots__ = ("item_id", "item_name", "category", "quantity", "status")
+
+    @property
+    def is_available(self):
+        return self.status == "Available"
+
+
+class Employee(Record):
+    """An employee from /employee/{id} or /employees"""
+
+    __slots__ = ("employee_id", "first_name", "last_name", "department")
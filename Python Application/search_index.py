@@ -0,0 +1,76 @@
+import re
+from bisect import bisect_left
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+
+
+def tokenize(text):
+    """Lower-case alphanumeric words of ``text``"""
+    return _TOKEN.findall(str(text).lower())
+
+
+class SearchIndex:
+    """Prefix index over a few text fields of a list of records.
+
+    Every word of every indexed field (plus each whole field value, so IDs
+    like ``RPI4-8GB`` can be typed as-is) maps to the rows containing it.
+    A query matches a row when each of its words is the start of some word
+    in that row. Typing more characters only narrows the previous result,
+    so an incremental search re-checks the rows already on screen instead
+    of the whole list.
+    """
+
+    def __init__(self, records, fields):
+        self.records = records
+        postings = {}
+        for position, record in enumerate(records):
+            for field in fields:
+                value = getattr(record, field)
+                if value is None:
+                    continue
+                words = tokenize(value)
+                whole = str(value).lower().strip()
+                if whole and whole not in words:
+                    words.append(whole)
+                for word in words:
+                    postings.setdefault(word, set()).add(position)
+
+        self._words = sorted(postings)
+        self._postings = postings
+        self._last_query = None
+        self._last_result = None
+
+    def _prefix_matches(self, prefix):
+        """Rows containing a word that starts with ``prefix``"""
+        rows = set()
+        start = bisect_left(self._words, prefix)
+        for word in self._words[start:]:
+            if not word.startswith(prefix):
+                break
+            rows |= self._postings[word]
+        return rows
+
+    def search(self, query):
+        """Return the records matching ``query``, in their original order"""
+        query = query.lower().strip()
+        words = tokenize(query)
+        if not words:
+            self._last_query, self._last_result = None, None
+            return list(self.records)
+
+        if self._last_query is not None and query.startswith(self._last_query):
+            # Only the last word of the previous query can have grown
+            candidates = self._last_result
+            words = words[max(len(tokenize(self._last_query)) - 1, 0):]
+        else:
+            candidates = range(len(self.records))
+
+        result = list(candidates)
+        for word in words:
+            rows = self._prefix_matches(word)
+            result = [position for position in result if position in rows]
+            if not result:
+                break
+
+        self._last_query, self._last_result = query, result
+        return [self.records[position] for position in result]
@@ -0,0 +1,71 @@
+import threading
+
+# Number of keys whose call counts are remembered (oldest are dropped first)
+MAX_TRACKED_KEYS = 1024
+
+
+class _Call:
+    """One in-flight execution that later callers can wait on"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into a single execution.
+
+    The first caller for a key runs the function; everyone who asks for the
+    same key while it is running waits and receives the very same result (or
+    exception). The shared result must be treated as read-only.
+    """
+
+    def __init__(self, max_tracked_keys=MAX_TRACKED_KEYS):
+        self.max_tracked_keys = max_tracked_keys
+        self._calls = {}
+        self._stats = {}  # key -> [calls, executions]
+        self._lock = threading.Lock()
+
+    def do(self, key, function, *args, **kwargs):
+        with self._lock:
+            stats = self._stats.pop(key, None) or [0, 0]
+            self._stats[key] = stats  # re-insert so recently used keys are kept
+            while len(self._stats) > self.max_tracked_keys:
+                del self._stats[next(iter(self._stats))]
+
+            stats[0] += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                stats[1] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = function(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def stats(self):
+        """Per-key counts: calls made, requests actually executed, and calls saved"""
+        with self._lock:
+            return {key: {"calls": calls, "executions": executions, "saved": calls - executions}
+                    for key, (calls, executions) in self._stats.items()}
+
+    def total_saved(self):
+        with self._lock:
+            return sum(calls - executions for calls, executions in self._stats.values())
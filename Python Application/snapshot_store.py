@@ -0,0 +1,69 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Where the last known inventory, employee directory and histories are kept
+SNAPSHOT_FILE = os.environ.get("EQUIPFLOW_SNAPSHOT_FILE",
+                               os.path.join(os.path.expanduser("~"), ".equipflow", "snapshot.db"))
+
+# Snapshots older than this are ignored and purged (seconds)
+MAX_AGE = 7 * 24 * 3600
+
+
+class SnapshotStore:
+    """On-disk copy of the last records loaded for each dataset.
+
+    Records are stored compactly as one JSON document per key: the record
+    type's slot names once, then a list of value rows. Readers get back
+    ``(records, saved_at)`` so the UI can show data immediately on start-up
+    or login and say how old it is, while a fresh copy is fetched in the
+    background.
+    """
+
+    def __init__(self, path=SNAPSHOT_FILE, max_age=MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS snapshots (
+            key TEXT PRIMARY KEY,
+            saved_at REAL NOT NULL,
+            data TEXT NOT NULL)""")
+        self._db.execute("DELETE FROM snapshots WHERE saved_at < ?", (time.time() - max_age,))
+
+    def save(self, key, records):
+        """Replace the snapshot for ``key`` with a list of records"""
+        columns = type(records[0]).__slots__ if records else ()
+        data = json.dumps({"columns": columns,
+                           "rows": [[getattr(record, column) for column in columns] for record in records]},
+                          separators=(",", ":"), default=str)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO snapshots (key, saved_at, data) VALUES (?, ?, ?)",
+                             (key, time.time(), data))
+
+    def load(self, key, record_type):
+        """Return ``(records, saved_at)`` for ``key``, or None if there is no usable snapshot"""
+        with self._lock:
+            row = self._db.execute("SELECT saved_at, data FROM snapshots WHERE key = ?", (key,)).fetchone()
+        if row is None or time.time() - row[0] > self.max_age:
+            return None
+
+        saved_at, data = row
+        data = json.loads(data)
+        if data["rows"] and list(data["columns"]) != list(record_type.__slots__):
+            return None  # written by a version with a different record layout
+        return [record_type(*values) for values in data["rows"]], saved_at
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM snapshots WHERE key = ?", (key,))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
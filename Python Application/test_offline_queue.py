@@ -0,0 +1,59 @@
+import unittest
+
+from offline_queue import MAX_ATTEMPTS, OfflineQueue
+
+
+class FakeResponse:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class OfflineQueueTest(unittest.TestCase):
+    """Replays are driven by calling _replay directly, so no thread or backoff is involved"""
+
+    def setUp(self):
+        self.outcomes = []
+        self.dropped = []
+        self.queue = OfflineQueue(self.send, path=":memory:", on_error=lambda write, error: self.dropped.append(error))
+
+    def tearDown(self):
+        self.queue.close()
+
+    def send(self, url, payload, key):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return FakeResponse(outcome)
+
+    def test_outage_then_server_error_keeps_the_write(self):
+        self.outcomes = [OSError("unreachable")] * (MAX_ATTEMPTS + 2) + [503]
+        self.assertIsNone(self.queue.submit("http://api/checkout", {"item_id": 1}))
+        for _ in range(MAX_ATTEMPTS + 1):
+            self.assertFalse(self.queue._replay())
+        self.assertFalse(self.queue._replay())  # HTTP 503
+
+        [write] = self.queue.pending()
+        self.assertEqual(write.attempts, MAX_ATTEMPTS + 3)
+        self.assertEqual(write.rejections, 1)
+        self.assertEqual(self.dropped, [])
+
+    def test_write_the_server_keeps_failing_is_dropped(self):
+        self.outcomes = [503] * MAX_ATTEMPTS + [200]
+        self.queue.submit("http://api/checkout", {"item_id": 1})
+        self.queue.submit("http://api/checkout", {"item_id": 2})
+        for _ in range(MAX_ATTEMPTS - 2):
+            self.assertFalse(self.queue._replay())
+        self.assertTrue(self.queue._replay())
+
+        self.assertEqual(self.dropped, ["HTTP 503"])
+        self.assertEqual(self.queue.pending_count(), 0)
+
+    def test_unexpected_error_on_submit_is_not_replayed(self):
+        self.outcomes = [ValueError("bad response")]
+        with self.assertRaises(ValueError):
+            self.queue.submit("http://api/return", {"booking_id": 1})
+        self.assertEqual(self.queue.pending_count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
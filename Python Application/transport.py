@@ -0,0 +1,263 @@
+import random
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+import metrics
+
+# Connection pool: hosts kept and connections per host (>= worker threads that talk to the API)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 16
+
+# (connect, read) timeouts in seconds, by endpoint path
+DEFAULT_TIMEOUTS = (
+    (r"/employees$", (3.05, 10)),
+    (r"/history/[^/]+$", (3.05, 20)),
+    (r"/(checkout|return)$", (3.05, 15)),
+)
+
+# Timeout for endpoints that don't match any of the rules above
+DEFAULT_TIMEOUT = (3.05, 15)
+
+# Extra attempts for GETs that failed to connect or got 502/503/504
+GET_RETRIES = 2
+
+# Base delay before a retry; doubled per attempt and jittered (seconds)
+RETRY_BACKOFF = 0.3
+
+RETRY_STATUSES = {502, 503, 504}
+
+# Consecutive failures that open the circuit, and how long it stays open (seconds)
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30
+
+
+def endpoint_name(url):
+    """Short, low-cardinality name of an API endpoint for metrics (``/api/history/1567`` -> history)"""
+    segments = [segment for segment in urlsplit(url).path.split("/") if segment]
+    for segment in reversed(segments):
+        if not any(character.isdigit() for character in segment):
+            return segment
+    return "/"
+
+
+class _TimedConnectionMixin:
+    """Reports how long new connections take to open.
+
+    urllib3 resolves the host name and connects in a single call, so
+    ``equipflow_api_connect_seconds`` is DNS lookup plus TCP connect; the
+    TLS handshake on top of it is ``equipflow_api_tls_seconds``.
+    """
+
+    _connect_seconds = 0.0
+
+    def _new_conn(self):
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        self._connect_seconds = time.perf_counter() - started
+        metrics.observe("equipflow_api_connect_seconds", self._connect_seconds, host=self.host)
+        return sock
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        metrics.observe("equipflow_api_tls_seconds", time.perf_counter() - started - self._connect_seconds,
+                        host=self.host)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedAdapter(HTTPAdapter):
+    """HTTPAdapter whose new connections report connect and TLS handshake times"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """The API has been failing, so requests fail fast instead of waiting for timeouts"""
+
+
+class CircuitBreaker:
+    """Stop calling a host that keeps failing, and probe it again later.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    every request fails immediately with CircuitOpenError. Once
+    ``reset_timeout`` has passed a single request is let through: if it
+    succeeds the circuit closes, if it fails the circuit stays open for
+    another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if self._probing or time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    @property
+    def degraded(self):
+        """True while the host is failing: the circuit isn't closed, or the last request failed"""
+        with self._lock:
+            return self.opened_at is not None or self.failures > 0
+
+    def before_request(self):
+        """Raise CircuitOpenError unless a request may be sent now"""
+        with self._lock:
+            if self.opened_at is None:
+                return
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0 or self._probing:
+                raise CircuitOpenError(f"API unavailable - retrying in {max(remaining, 0):.0f}s")
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._probing or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+
+class Transport:
+    """HTTP client for the ORDS API.
+
+    * One tuned, keep-alive connection pool shared by every thread (each
+      thread still gets its own ``requests.Session``).
+    * Separate connect and read timeouts per endpoint.
+    * Idempotent GETs are retried with jittered exponential backoff when the
+      connection fails or the gateway answers 502/503/504. POSTs are never
+      retried here (the offline queue owns that).
+    * A circuit breaker per host makes calls fail fast while ORDS is down.
+    * With metrics enabled every attempt is timed per endpoint, along with
+      time to first byte, connect and TLS handshake times, errors, retries
+      and requests refused by an open circuit.
+    """
+
+    def __init__(self, headers=None, verify=True, timeouts=DEFAULT_TIMEOUTS, default_timeout=DEFAULT_TIMEOUT,
+                 retries=GET_RETRIES, backoff=RETRY_BACKOFF,
+                 pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE):
+        self.headers = dict(headers or {})
+        self.verify = verify
+        self.timeouts = [(re.compile(pattern), timeout) for pattern, timeout in timeouts]
+        self.default_timeout = default_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.adapter = _TimedAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=0)
+        self._local = threading.local()
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def session(self):
+        """Return this thread's session, wired to the shared connection pool"""
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = requests.Session()
+            session.verify = self.verify
+            session.headers.update(self.headers)
+            session.mount("https://", self.adapter)
+            session.mount("http://", self.adapter)
+            self._local.session = session
+        return session
+
+    def timeout_for(self, url):
+        path = urlsplit(url).path
+        for pattern, timeout in self.timeouts:
+            if pattern.search(path):
+                return timeout
+        return self.default_timeout
+
+    def breaker(self, url):
+        host = urlsplit(url).netloc
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker()
+            return breaker
+
+    def get(self, url, headers=None):
+        return self.request("GET", url, headers=headers)
+
+    def post(self, url, json=None, headers=None):
+        return self.request("POST", url, json=json, headers=headers)
+
+    def request(self, method, url, headers=None, **kwargs):
+        breaker = self.breaker(url)
+        endpoint = endpoint_name(url) if metrics.enabled else None
+        attempts = 1 + (self.retries if method == "GET" else 0)
+        for attempt in range(attempts):
+            try:
+                breaker.before_request()
+            except CircuitOpenError:
+                metrics.inc("equipflow_api_circuit_open_total", endpoint=endpoint)
+                raise
+            started = time.perf_counter()
+            try:
+                response = self.session().request(method, url, headers=headers,
+                                                  timeout=self.timeout_for(url), **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                metrics.inc("equipflow_api_errors_total", endpoint=endpoint, error=type(e).__name__)
+                breaker.record_failure()
+                # A read timeout means the server is slow, not unreachable; don't pile on
+                if attempt + 1 == attempts or isinstance(e, requests.exceptions.ReadTimeout):
+                    raise
+            except BaseException as e:
+                # Anything else (a broken chunked body, too many redirects...) is not retried, but it
+                # must still end a half-open probe or the circuit would stay shut for good
+                metrics.inc("equipflow_api_errors_total", endpoint=endpoint, error=type(e).__name__)
+                breaker.record_failure()
+                raise
+            else:
+                if metrics.enabled:
+                    metrics.observe("equipflow_api_request_seconds", time.perf_counter() - started,
+                                    method=method, endpoint=endpoint, status=response.status_code)
+                    # Sending the request until the headers were parsed (includes connecting, if needed)
+                    metrics.observe("equipflow_api_ttfb_seconds", response.elapsed.total_seconds(),
+                                    endpoint=endpoint)
+                if response.status_code not in RETRY_STATUSES:
+                    breaker.record_success()
+                    return response
+                breaker.record_failure()
+                if attempt + 1 == attempts:
+                    return response
+
+            metrics.inc("equipflow_api_retries_total", endpoint=endpoint)
+            time.sleep(random.uniform(0, self.backoff * 2 ** attempt))
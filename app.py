@@ -0,0 +1,342 @@
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+
+import streamlit as st
+from streamlit_webrtc import WebRtcMode, webrtc_streamer
+
+# The client modules live next to the desktop application
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "Python Application"))
+
+import metrics
+import ords_client
+from decode_pool import DecodePool
+from history_sync import HistoryStore
+
+# Frames per second each station sends to the decode pool while it is scanning
+SAMPLE_FPS = 4
+
+# Frames wider than this are scaled down before they are decoded (pixels)
+DECODE_MAX_WIDTH = 960
+
+# Seconds to wait for a QR code before giving up
+SCAN_TIMEOUT = 30
+
+# How often a scanning station checks for a decoded code (seconds); the page stays usable in between
+SCAN_POLL = 0.25
+
+# How long every station shares one inventory list before ORDS is asked again (seconds)
+INVENTORY_TTL = 15
+
+# STUN/TURN servers the browsers use to reach this server (JSON list, like RTCPeerConnection's iceServers)
+ICE_SERVERS = json.loads(os.environ.get("EQUIPFLOW_ICE_SERVERS", '[{"urls": ["stun:stun.l.google.com:19302"]}]'))
+
+
+@st.cache_resource
+def get_decode_pool():
+    """The QR decode worker processes shared by every browser session"""
+    return DecodePool()
+
+
+@st.cache_resource
+def start_metrics():
+    """Serve/write metrics when EQUIPFLOW_METRICS_PORT or EQUIPFLOW_METRICS_FILE is set (once per server)"""
+    port = os.environ.get("EQUIPFLOW_METRICS_PORT")
+    path = os.environ.get("EQUIPFLOW_METRICS_FILE")
+    if port or path:
+        metrics.enable(port=int(port) if port else None, path=path,
+                       host=os.environ.get("EQUIPFLOW_METRICS_HOST", "127.0.0.1"))
+    return metrics.enabled
+
+
+class FrameSampler:
+    """Hands one station's camera frames to the shared decode pool.
+
+    Runs on the WebRTC thread. Frames are only sent while the station is
+    scanning, at most SAMPLE_FPS per second and one at a time, so a station
+    never costs more than a fixed share of the pool however fast its camera
+    is.
+    """
+
+    def __init__(self, pool, fps=SAMPLE_FPS):
+        self.pool = pool
+        self.interval = 1.0 / fps
+        self.scanning = False
+        self._last = 0.0
+        self._pending = None
+        self._code = None
+        self._lock = threading.Lock()
+
+    def __call__(self, frame):
+        if self.scanning:
+            now = time.monotonic()
+            with self._lock:
+                if self._pending is None and now - self._last >= self.interval:
+                    self._last = now
+                    self._pending = self._submit(frame)
+        return frame
+
+    def _submit(self, frame):
+        if frame.width > DECODE_MAX_WIDTH:
+            height = int(frame.height * DECODE_MAX_WIDTH / frame.width)
+            gray = frame.reformat(width=DECODE_MAX_WIDTH, height=height, format="gray").to_ndarray()
+        else:
+            gray = frame.to_ndarray(format="gray")
+        future = self.pool.submit(gray)
+        if future is not None:
+            future.add_done_callback(self._decoded)
+        return future
+
+    def _decoded(self, future):
+        try:
+            code = future.result()
+        except Exception:
+            code = ""
+        with self._lock:
+            self._pending = None
+            if code and self.scanning:
+                self._code = code
+
+    def start(self):
+        with self._lock:
+            self._code = None
+        self.scanning = True
+
+    def stop(self):
+        self.scanning = False
+
+    def take(self):
+        """Return the code decoded since ``start``, or None"""
+        with self._lock:
+            code, self._code = self._code, None
+        return code
+
+
+@st.cache_data(ttl=INVENTORY_TTL, show_spinner=False)
+def get_available_inventory():
+    """Available items, shared by every station for INVENTORY_TTL seconds"""
+    return ords_client.fetch_available_inventory()
+
+
+def submit_write(path, payload):
+    """POST a checkout or return, returning (success, message)"""
+    try:
+        response = ords_client.make_api_request(f"{ords_client.API_URL}/{path}", "POST", payload,
+                                                headers={"Idempotency-Key": str(uuid.uuid4())})
+    except ords_client.NetworkError as e:
+        return False, f"Could not reach the API: {e}"
+    except Exception as e:
+        return False, str(e)
+    if response.status_code == 200:
+        return True, None
+    return False, ords_client.api_error(response)
+
+
+def scan(ctx, prompt, key, timeout=SCAN_TIMEOUT):
+    """Return the QR code scanned for ``key`` once this station's camera has seen one, else None.
+
+    Nothing blocks while waiting: a fragment polls the decode results every
+    SCAN_POLL seconds and reruns the page when a code arrives or the scan
+    times out, so buttons like Cancel and Log out keep working.
+    """
+    state = st.session_state
+    scanned = state.get("scanned")
+    if scanned is not None and scanned[0] == key:
+        state.scanned = None
+        return scanned[1]
+    if not ctx.state.playing:
+        stop_scan()
+        st.info("📷 Start the camera in the sidebar to scan")
+        return None
+    if state.get("scan_expired") == key:
+        st.warning("⌛ Scan timed out")
+        if st.button("Scan again"):
+            state.scan_expired = None
+            st.rerun()
+        return None
+
+    st.info(prompt)
+    if state.get("scan_key") != key:
+        state.scan_key = key
+        state.scan_deadline = time.monotonic() + timeout
+        state.sampler.start()
+    poll_scan(key)
+    return None
+
+
+@st.fragment(run_every=SCAN_POLL)
+def poll_scan(key):
+    state = st.session_state
+    if state.get("scan_key") != key:
+        return
+    code = state.sampler.take()
+    if code:
+        stop_scan()
+        state.scanned = (key, code)
+        st.rerun()
+    elif time.monotonic() >= state.scan_deadline:
+        stop_scan()
+        state.scan_expired = key
+        st.rerun()
+
+
+def stop_scan():
+    """Stop sending this station's frames to the decode pool and forget the scan's outcome"""
+    state = st.session_state
+    state.sampler.stop()
+    state.scan_key = state.scanned = state.scan_expired = None
+
+
+def login_page(ctx):
+    st.title("📦 Nexora Equipment Kiosk")
+    code = scan(ctx, "📷 Hold your employee QR code up to the camera to log in", "login")
+    if not code:
+        return
+    if not code.startswith("EMP"):
+        st.session_state.flash = ("error", "❌ Invalid QR code format")
+        st.rerun()
+
+    emp_id = code.replace("EMP", "")
+    try:
+        employee = ords_client.fetch_employee(emp_id)
+    except Exception as e:
+        st.session_state.flash = ("error", f"❌ Error getting employee info: {e}")
+        st.rerun()
+    st.session_state.emp_id = emp_id
+    st.session_state.employee = employee
+    st.session_state.history = HistoryStore()
+    st.rerun()
+
+
+def confirm_page(ctx, emp_id):
+    """Ask for the employee's QR code before sending the pending checkout or return"""
+    pending = st.session_state.pending
+    st.subheader(f"Confirm: {pending['label']}")
+    if st.button("Cancel"):
+        stop_scan()
+        st.session_state.pending = None
+        st.rerun()
+
+    code = scan(ctx, "📷 Scan your employee QR code to confirm identity...", "confirm")
+    if not code:
+        return
+    st.session_state.pending = None
+    if code != f"EMP{emp_id}":
+        st.session_state.flash = ("error", "❌ QR Code does not match your Employee ID")
+        st.rerun()
+
+    build = ords_client.checkout_payload if pending["action"] == "checkout" else ords_client.return_payload
+    success, message = submit_write(pending["action"], build(emp_id, pending["data"], code))
+    if success:
+        st.session_state.flash = ("success", f"✅ {pending['label']} - done!")
+        get_available_inventory.clear()
+    else:
+        st.session_state.flash = ("error", f"❌ {pending['label']} failed: {message}")
+    st.rerun()
+
+
+def session_page(ctx):
+    state = st.session_state
+    emp_id = state.emp_id
+    employee = state.employee
+    name = f"{employee.first_name or 'User'} {employee.last_name or ''}" if employee else f"Employee {emp_id}"
+    st.title(f"👋 Welcome, {name}!")
+    if employee:
+        st.caption(f"Employee ID: {emp_id} · Department: {employee.department or 'Unknown'}")
+    if st.button("🔒 Log out"):
+        stop_scan()
+        for key in ("emp_id", "employee", "history", "pending"):
+            state.pop(key, None)
+        st.rerun()
+
+    if state.get("pending"):
+        confirm_page(ctx, emp_id)
+        return
+
+    # Each session keeps its own history: only new and open bookings are fetched after the first time
+    store = state.history
+    try:
+        ords_client.update_history(store, emp_id)
+    except Exception as e:
+        st.error(f"❌ Failed to fetch history: {e}")
+
+    checkout_tab, return_tab, history_tab = st.tabs(["Check out", "Return", "History"])
+
+    with checkout_tab:
+        try:
+            inventory = get_available_inventory()
+        except Exception as e:
+            st.error(f"❌ Failed to fetch inventory: {e}")
+            inventory = []
+        if not inventory:
+            st.write("No equipment available right now")
+        else:
+            item = st.selectbox("Equipment", inventory,
+                                format_func=lambda i: f"{i.item_name} ({i.category or 'General'}) - ID: {i.item_id}")
+            notes = st.text_input("Notes", key="checkout_notes")
+            damaged = st.checkbox("Already damaged", key="checkout_damaged")
+            if st.button("Check out", type="primary"):
+                state.pending = {"action": "checkout", "label": f"Check out {item.item_name}", "data": {
+                    "item_id": item.item_id,
+                    "notes": notes,
+                    "is_damaged": "Y" if damaged else "N",
+                }}
+                st.rerun()
+
+    with return_tab:
+        checkouts = store.open_checkouts()
+        if not checkouts:
+            st.write("You have no equipment checked out")
+        else:
+            booking = st.selectbox("Equipment", checkouts,
+                                   format_func=lambda b: f"{b.item_name} (Booking ID: {b.booking_id})")
+            notes = st.text_input("Notes", key="return_notes")
+            damaged = st.checkbox("Returned damaged", key="return_damaged")
+            if st.button("Return", type="primary"):
+                state.pending = {"action": "return", "label": f"Return {booking.item_name}", "data": {
+                    "booking_id": booking.booking_id,
+                    "notes": notes,
+                    "is_damaged": "Y" if damaged else "N",
+                }}
+                st.rerun()
+
+    with history_tab:
+        entries = store.entries()
+        if entries:
+            st.dataframe([entry.to_dict() for entry in reversed(entries)], use_container_width=True, hide_index=True)
+        else:
+            st.write("No history found")
+
+
+def main():
+    st.set_page_config(page_title="Nexora Equipment Kiosk", page_icon="📦")
+    start_metrics()
+    state = st.session_state
+    if "sampler" not in state:
+        state.sampler = FrameSampler(get_decode_pool())
+
+    # One camera stream per station for the whole visit, so scans don't renegotiate WebRTC
+    with st.sidebar:
+        ctx = webrtc_streamer(
+            key="camera",
+            mode=WebRtcMode.SENDRECV,
+            rtc_configuration={"iceServers": ICE_SERVERS},
+            media_stream_constraints={"video": True, "audio": False},
+            video_frame_callback=state.sampler,
+            desired_playing_state=True,
+        )
+
+    flash = state.pop("flash", None)
+    if flash:
+        getattr(st, flash[0])(flash[1])
+
+    if state.get("emp_id") is None:
+        login_page(ctx)
+    else:
+        session_page(ctx)
+
+
+main()